@@ -1,29 +1,75 @@
 import streamlit as st
-from utils.database_utils import create_database, save_progress, get_progress
-import speech_recognition as sr
-from utils.llm_utils import load_config
+from utils.database_utils import create_database, enqueue_progress, get_progress_writer, get_progress
+from utils.database_utils import get_attempt_counts, get_category_trends, get_weakest_questions
+from utils.config import load_config
 from utils.file_processing import extract_text_from_file
-from utils.llm_utils import customize_resume
+from utils.llm_utils import stream_customized_resume
+from utils.resume_matching import match_resume, skills_gap_summary
 from utils.llm_utils import generate_mock_questions, parse_questions, evaluate_answer
-from utils.voice_utils import record_audio_segment
-
-def record_audio():
-    """Capture audio input and convert it to text."""
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        st.info("Listening... Please speak into the microphone.")
-        try:
-            audio = recognizer.listen(source, timeout=10)
-            text = recognizer.recognize_google(audio)
-            st.success("Audio captured successfully!")
-            return text
-        except sr.UnknownValueError:
-            st.error("Could not understand the audio. Please try again.")
-        except sr.RequestError as e:
-            st.error(f"Could not request results from the speech recognition service; {e}")
-        except Exception as e:
-            st.error(f"An error occurred: {e}")
-    return ""
+from utils.llm_utils import evaluate_answers_concurrently, parse_score
+from utils.session import apply_rate_limits, get_session_id, get_user_id, session_documents, stored_documents
+from src.document_preview import document_preview
+from src.metrics_panel import metrics_debug_panel
+
+@st.fragment(run_every=1)
+def voice_capture_status(capture_key):
+    """Polls a running capture and reruns the app when new transcript text is ready."""
+    capture = st.session_state.get(capture_key)
+    if capture is None:
+        return
+    if capture.stopping:
+        st.caption(f"⏳ Finishing transcription of {capture.segments_recorded} segment(s)...")
+    else:
+        st.caption(f"🎙️ Listening... {capture.segments_recorded} segment(s) recorded")
+    if capture.has_new_text() or capture.is_finished:
+        st.rerun()
+
+def voice_record_button(label, capture_key):
+    """
+    Start/stop button for background voice capture. Recording and transcription
+    run off the script thread; returns transcript text that arrived since the
+    last rerun so the caller can append it to the answer.
+    """
+    capture = st.session_state.get(capture_key)
+    if capture is None:
+        if st.button(f"Record {label}", key=f"record_{capture_key}"):
+            # speech_recognition is only loaded once someone records
+            from utils.voice_utils import start_voice_capture
+
+            st.session_state[capture_key] = start_voice_capture()
+            st.rerun()
+        return ""
+
+    # Stopping only signals the recorder; the last segments are transcribed in the
+    # background and picked up by the status fragment, so the script never blocks.
+    if not capture.stopping and st.button(f"Stop Recording {label}", key=f"stop_{capture_key}"):
+        capture.stop()
+    if capture.is_finished:
+        del st.session_state[capture_key]
+        for error in capture.errors:
+            st.error(error)
+        return capture.take_text()
+
+    voice_capture_status(capture_key)
+    return capture.take_text()
+
+def evaluate_pending_answers(pending, api_key):
+    """
+    Evaluate (key, question, answer) items concurrently and show each feedback
+    as soon as it arrives. Returns {key: feedback} for the successful ones.
+    """
+    placeholders = {key: st.empty() for key, _, _ in pending}
+    questions = {key: question for key, question, _ in pending}
+    progress = st.progress(0.0, text="Evaluating answers...")
+    results = {}
+    for done, (key, feedback, error) in enumerate(evaluate_answers_concurrently(pending, api_key), start=1):
+        if error is not None:
+            placeholders[key].error(f"Failed to evaluate '{questions[key]}': {error}")
+        else:
+            placeholders[key].markdown(f"**{questions[key]}**\n\n{feedback}")
+            results[key] = feedback
+        progress.progress(done / len(pending), text=f"Evaluated {done}/{len(pending)} answers")
+    return results
 
 def custom_interview_prep(api_key):
     st.header("Custom Interview Preparation")
@@ -49,13 +95,13 @@ def custom_interview_prep(api_key):
 
         cols = st.columns(2)
         with cols[0]:
-            record_clicked = st.button(f"Record Answer for Q{idx + 1}", key=f"record_{idx}")
+            recorded_text = voice_record_button(f"Answer for Q{idx + 1}", f"voice_custom_{idx}")
         with cols[1]:
             submit_clicked = st.button(f"Submit Answer for Q{idx + 1}", key=f"submit_{idx}")
 
-        if record_clicked:
-            recorded_text = record_audio()
-            st.session_state.custom_questions[idx]["answer"] += f" {recorded_text}".strip()
+        if recorded_text:
+            previous = st.session_state.custom_questions[idx]["answer"]
+            st.session_state.custom_questions[idx]["answer"] = f"{previous} {recorded_text}".strip()
 
         answer = st.text_area(
             f"Your Answer for Q{idx + 1}:",
@@ -72,10 +118,38 @@ def custom_interview_prep(api_key):
                 st.session_state.custom_questions[idx]["feedback"] = feedback
                 st.text_area(f"Feedback for Q{idx + 1}:", feedback, height=100)
 
-                save_progress(question, answer, feedback, score=None)
+                enqueue_progress(
+                    question, answer, feedback, score=None, category="Custom",
+                    user_id=get_user_id(), session_id=get_session_id(),
+                )
             else:
                 st.warning("Please provide an answer before submitting.")
 
+    if st.button("Evaluate All Unscored Answers", key="evaluate_all_custom"):
+        pending = [
+            (idx, q_data["question"], q_data["answer"])
+            for idx, q_data in enumerate(st.session_state.custom_questions)
+            if q_data["answer"].strip() and not q_data["feedback"]
+        ]
+        if pending:
+            results = evaluate_pending_answers(pending, api_key)
+            records = []
+            for idx, feedback in results.items():
+                q_data = st.session_state.custom_questions[idx]
+                q_data["feedback"] = feedback
+                records.append({
+                    "question": q_data["question"],
+                    "answer": q_data["answer"],
+                    "feedback": feedback,
+                    "score": None,
+                    "category": "Custom",
+                    "user_id": get_user_id(),
+                    "session_id": get_session_id(),
+                })
+            get_progress_writer().submit_many(records)
+        else:
+            st.info("There are no answered questions waiting for feedback.")
+
     if st.button("Add Another Question", key="add_question"):
         st.session_state.custom_questions.append({
             "question": "",
@@ -86,9 +160,10 @@ def custom_interview_prep(api_key):
 def interview_preparation(api_key):
     st.header("Interview Preparation")
     job_title = st.text_input("Enter Job Title:")
+    fresh_questions = st.checkbox("Generate a fresh set (skip cached questions)")
     if st.button("Generate Mock Questions"):
         with st.spinner("Generating mock questions, please wait..."):
-            generated_text = generate_mock_questions(job_title, api_key)
+            generated_text = generate_mock_questions(job_title, api_key, use_cache=not fresh_questions)
             behavioral_questions, technical_questions = parse_questions(generated_text)
 
             if behavioral_questions:
@@ -112,16 +187,16 @@ def interview_preparation(api_key):
 
             cols = st.columns(2)
             with cols[0]:
-                record_clicked = st.button(f"Record Answer for Q{i + 1}", key=f"record_{i}_{label}")
+                recorded_text = voice_record_button(f"Answer for Q{i + 1}", f"voice_{i}_{label}")
             with cols[1]:
                 submit_clicked = st.button(f"Submit Answer for Q{i + 1}", key=f"submit_{i}_{label}")
 
             if f"combined_answer_{i}_{label}" not in st.session_state:
                 st.session_state[f"combined_answer_{i}_{label}"] = ""
 
-            if record_clicked:
-                recorded_text = record_audio()
-                st.session_state[f"combined_answer_{i}_{label}"] += f" {recorded_text}".strip()
+            if recorded_text:
+                previous = st.session_state[f"combined_answer_{i}_{label}"]
+                st.session_state[f"combined_answer_{i}_{label}"] = f"{previous} {recorded_text}".strip()
 
             combined_answer = st.text_area(
                 f"Your Answer for Q{i + 1}:",
@@ -141,15 +216,91 @@ def interview_preparation(api_key):
 
                     st.text_area(f"Feedback for Q{i + 1}:", st.session_state[f"feedback_{i}_{label}"], height=100)
 
-                    score = float(feedback.split("Score: ")[-1].split("/")[0]) if "Score:" in feedback else None
-                    save_progress(question, combined_answer, st.session_state[f"feedback_{i}_{label}"], score)
+                    score = parse_score(feedback)
+                    enqueue_progress(
+                        question, combined_answer, st.session_state[f"feedback_{i}_{label}"], score,
+                        category=label, user_id=get_user_id(), session_id=get_session_id(),
+                    )
                 else:
                     st.warning("Please provide an answer before submitting.")
 
+    question_sets = {
+        "Behavioral": st.session_state.get("behavioral_questions", []),
+        "Technical": st.session_state.get("technical_questions", []),
+    }
+    if any(question_sets.values()) and st.button("Evaluate All Unscored Answers", key="evaluate_all_generated"):
+        pending = [
+            ((i, label), question, st.session_state.get(f"combined_answer_{i}_{label}", ""))
+            for label, question_set in question_sets.items()
+            for i, question in enumerate(question_set)
+            if st.session_state.get(f"combined_answer_{i}_{label}", "").strip()
+            and f"feedback_{i}_{label}" not in st.session_state
+        ]
+        if pending:
+            answers = {key: answer for key, _, answer in pending}
+            questions = {key: question for key, question, _ in pending}
+            results = evaluate_pending_answers(pending, api_key)
+            records = []
+            for (i, label), feedback in results.items():
+                st.session_state[f"feedback_{i}_{label}"] = feedback
+                records.append({
+                    "question": questions[(i, label)],
+                    "answer": answers[(i, label)],
+                    "feedback": feedback,
+                    "score": parse_score(feedback),
+                    "category": label,
+                    "user_id": get_user_id(),
+                    "session_id": get_session_id(),
+                })
+            get_progress_writer().submit_many(records)
+        else:
+            st.info("There are no answered questions waiting for feedback.")
+
+def progress_dashboard():
+    st.header("Progress Dashboard")
+    # Make answers submitted moments ago visible before reading the rollups.
+    get_progress_writer().flush(timeout=2)
+
+    user_id = get_user_id()
+    counts = get_attempt_counts(user_id=user_id)
+    if not counts:
+        st.info("No answers recorded yet. Evaluate some interview answers to see your progress.")
+        return
+
+    cols = st.columns(len(counts))
+    for col, row in zip(cols, counts):
+        average = f"{row['average_score']:.1f}/10" if row["average_score"] is not None else "n/a"
+        col.metric(row["category"], average, f"{row['attempts']} attempts", delta_color="off")
+
+    days = st.slider("Days of history", min_value=7, max_value=180, value=30)
+    trends = get_category_trends(days, user_id=user_id)
+    if trends:
+        st.subheader("Average Score per Category")
+        chart_data = {}
+        for row in trends:
+            if row["average_score"] is not None:
+                chart_data.setdefault(row["category"], {})[row["day"]] = row["average_score"]
+        st.line_chart(chart_data)
+
+    st.subheader("Weakest Questions")
+    st.dataframe(
+        [dict(row) for row in get_weakest_questions(limit=10, user_id=user_id)],
+        column_order=["question", "category", "average_score", "scored_attempts", "attempts"],
+        use_container_width=True,
+    )
+
+    st.subheader("Recent Answers")
+    page = st.number_input("Page", min_value=1, value=1, step=1)
+    st.dataframe(
+        [dict(row) for row in get_progress(user_id=user_id, limit=20, offset=(page - 1) * 20)],
+        column_order=["category", "question", "score", "feedback"],
+        use_container_width=True,
+    )
+
 def main():
     st.title("Job Application Helper with Voice Input")
     st.sidebar.title("Navigation")
-    section = st.sidebar.radio("Choose Section", ["Resume Customization", "Interview Preparation", "Custom Interview Prep"])
+    section = st.sidebar.radio("Choose Section", ["Resume Customization", "Interview Preparation", "Custom Interview Prep", "Progress Dashboard"])
 
     api_key = load_config()
     if not api_key:
@@ -159,8 +310,6 @@ def main():
         st.warning("Please provide your OpenAI API Key to proceed.")
         return
 
-    if "resume_content" not in st.session_state:
-        st.session_state.resume_content = ""
     if "job_description" not in st.session_state:
         st.session_state.job_description = ""
     if "custom_questions" not in st.session_state:
@@ -181,15 +330,47 @@ def main():
         st.session_state.job_description = job_description
 
         uploaded_file = st.file_uploader("Upload Resume (PDF, DOCX, TXT)", type=["pdf", "docx", "txt"])
+        # The resume is kept as a DocumentHandle; only a page of it is sent to the browser per rerun.
         if uploaded_file:
-            resume_content = extract_text_from_file(uploaded_file)
-            st.session_state.resume_content = resume_content
-
-        st.text_area("Uploaded Resume Content:", st.session_state.resume_content, height=150)
+            try:
+                session_documents(
+                    "resume_content", uploaded_file.file_id,
+                    lambda: [(uploaded_file.name, extract_text_from_file(uploaded_file))],
+                )
+            except Exception as e:
+                # e.g. DocumentTooLargeError; any previously loaded resume is kept
+                st.error(f"Failed to load file '{uploaded_file.name}': {e}")
+        resume_documents = stored_documents("resume_content")
+        document_preview("Uploaded Resume Content:", resume_documents, key="resume_preview")
+
+        trim_resume = st.checkbox(
+            "Send only the resume sections relevant to the job (others are kept unchanged)", value=False
+        )
 
         if st.button("Customize Resume"):
-            customized_resume = customize_resume(job_description, st.session_state.resume_content, api_key)
-            st.text_area("Customized Resume:", customized_resume, height=300)
+            resume_content = resume_documents[0].text() if resume_documents else ""
+            match = None
+            if trim_resume and job_description.strip():
+                # Local TF-IDF pre-pass; drops sections unrelated to the job from the GPT-4 prompt
+                match = match_resume(resume_content, job_description)
+                kept = sum(section["kept"] for section in match["sections"])
+                st.caption(
+                    f"Sending {kept} of {len(match['sections'])} sections (score ≥ {match['threshold']}, "
+                    f"{match['relative_threshold']:.0%} of the best section) · {match['trimmed_tokens']} of "
+                    f"{match['original_tokens']} resume tokens, {match['saved_tokens']} saved · "
+                    f"matched in {match['elapsed_ms']} ms"
+                )
+                with st.expander("Section scores and skills gap"):
+                    st.dataframe(match["sections"], use_container_width=True)
+                    st.text(skills_gap_summary(match))
+
+            st.subheader("Customized Resume")
+            # Render tokens as they arrive; write_stream returns the full text once done.
+            st.session_state.customized_resume = st.write_stream(
+                stream_customized_resume(job_description, resume_content, api_key, match=match)
+            )
+        elif st.session_state.get("customized_resume"):
+            st.text_area("Customized Resume:", st.session_state.customized_resume, height=300)
 
     elif section == "Interview Preparation":
         interview_preparation(api_key)
@@ -197,6 +378,13 @@ def main():
     elif section == "Custom Interview Prep":
         custom_interview_prep(api_key)
 
+    elif section == "Progress Dashboard":
+        progress_dashboard()
+
+    # Rendered last so it includes the timings of this run
+    metrics_debug_panel()
+
 if __name__ == "__main__":
     create_database()
-    main()
\ No newline at end of file
+    apply_rate_limits()
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare two result files written by benchmarks.run.
+
+    python -m benchmarks.compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+Medians are compared per benchmark; changes beyond --threshold are marked
+as regressions or improvements. With --fail-on-regression the exit status
+is 1 if anything regressed, for use in scripts.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def compare(base, head, threshold):
+    """Yield (name, base_median, head_median, change, verdict); missing sides are None."""
+    base_results, head_results = base["results"], head["results"]
+    for name in list(base_results) + [name for name in head_results if name not in base_results]:
+        old = base_results.get(name, {}).get("median")
+        new = head_results.get(name, {}).get("median")
+        if old is None or new is None:
+            yield name, old, new, None, "added" if old is None else "removed"
+            continue
+        change = (new - old) / old if old else 0.0
+        if change > threshold:
+            verdict = "regression"
+        elif change < -threshold:
+            verdict = "improvement"
+        else:
+            verdict = ""
+        yield name, old, new, change, verdict
+
+
+def _ms(value):
+    return "-" if value is None else f"{value * 1000:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change to flag (default 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    if base.get("settings") != head.get("settings"):
+        print("Warning: the runs used different settings; timings may not be comparable.")
+    print(f"{'benchmark':<40} {base['commit']:>12} {head['commit']:>12} {'change':>9}")
+
+    regressions = 0
+    for name, old, new, change, verdict in compare(base, head, args.threshold):
+        change_text = "" if change is None else f"{change:+.1%}"
+        print(f"{name:<40} {_ms(old):>12} {_ms(new):>12} {change_text:>9}  {verdict}")
+        regressions += verdict == "regression"
+
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    if args.fail_on_regression and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Synthetic CVs and job descriptions as PDF, DOCX and TXT uploads of
+increasing size. Content is deterministic, so runs on different commits
+parse and embed exactly the same bytes.
+"""
+import io
+from docx import Document
+from utils.file_processing import DOCX_TYPE, PDF_TYPE, TXT_TYPE
+
+# Number of pages (PDF) or page-sized blocks of paragraphs (DOCX, TXT) per size.
+SIZES = {"small": 2, "medium": 20, "large": 100}
+LINES_PER_PAGE = 40
+
+SKILLS = [
+    "Python", "Kubernetes", "PostgreSQL", "Terraform", "React", "Kafka", "Airflow",
+    "Spark", "Go", "AWS", "GCP", "Docker", "GraphQL", "Redis", "Snowflake", "dbt",
+]
+
+
+class FakeUpload(io.BytesIO):
+    """In-memory stand-in for Streamlit's UploadedFile."""
+
+    def __init__(self, data, name, file_type):
+        super().__init__(data)
+        self.name = name
+        self.type = file_type
+
+
+def cv_lines(pages, seed=0):
+    lines = [f"Candidate {seed} - Senior Software Engineer"]
+    for i in range(pages * LINES_PER_PAGE - 1):
+        skill = SKILLS[(i + seed) % len(SKILLS)]
+        other = SKILLS[(i * 7 + seed) % len(SKILLS)]
+        lines.append(
+            f"{2024 - i % 15}: Company {seed}-{i} - built {skill} services and {other} pipelines, "
+            f"cut latency by {i % 60 + 5} percent for team of {i % 9 + 2}."
+        )
+    return lines
+
+
+def job_description():
+    return (
+        "Senior Platform Engineer. Requirements: 5+ years of Python, Kubernetes and Terraform; "
+        "experience with Kafka or Airflow; strong PostgreSQL skills; on-call ownership of "
+        "production services; mentoring engineers."
+    )
+
+
+def make_pdf(pages):
+    """Minimal uncompressed PDF with one text page per element of `pages`."""
+    objects = []
+    count = len(pages)
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(count))
+    font = 3 + 2 * count
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {count} >>")
+    for i, lines in enumerate(pages):
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines)
+        body = "BT /F1 8 Tf 30 770 Td 10 TL " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("ascii") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    return bytes(out)
+
+
+def make_docx(lines):
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_upload(kind, size, seed=0):
+    """A FakeUpload of the given kind ("pdf", "docx", "txt") and size name."""
+    pages = SIZES[size]
+    lines = cv_lines(pages, seed)
+    name = f"cv_{size}_{seed}.{kind}"
+    if kind == "pdf":
+        chunks = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+        return FakeUpload(make_pdf(chunks), name, PDF_TYPE)
+    if kind == "docx":
+        return FakeUpload(make_docx(lines), name, DOCX_TYPE)
+    if kind == "txt":
+        return FakeUpload("\n".join(lines).encode("utf-8"), name, TXT_TYPE)
+    raise ValueError(f"Unknown corpus kind: {kind}")
+
+
+def corpus(kinds=("pdf", "docx", "txt"), sizes=tuple(SIZES)):
+    """Yield (kind, size, upload) for every combination."""
+    for size in sizes:
+        for kind in kinds:
+            yield kind, size, make_upload(kind, size)
@@ -0,0 +1,259 @@
+"""
+Local fake of the OpenAI HTTP API for offline benchmarks.
+
+Implements /v1/chat/completions (plain and streamed), /v1/completions and
+/v1/embeddings with configurable latency and token rate, so the app's real
+client code paths can be timed without network access or API cost. With
+--max-concurrency / --requests-per-second it answers excess requests with
+429 like the real API does, and --error-rate adds random 500s.
+
+    python -m benchmarks.fake_openai --port 8765 --latency 0.2 --tokens-per-second 50
+    OPENAI_API_BASE=http://127.0.0.1:8765/v1 streamlit run app.py
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MOCK_QUESTIONS = """- Behavioral Questions:
+  1. Tell me about a time you handled conflicting priorities.
+  2. Describe a project you are proud of.
+  3. How do you respond to critical feedback?
+- Technical Questions:
+  1. How would you design a scalable data pipeline?
+  2. Explain the trade-offs between SQL and NoSQL stores."""
+
+
+class FakeOpenAIConfig:
+    def __init__(self, latency=0.0, tokens_per_second=0.0, completion_tokens=60, embedding_dimensions=256,
+                 max_concurrency=0, requests_per_second=0.0, error_rate=0.0, retry_after_ms=200):
+        # Seconds before the first token / before a non-streamed response body.
+        self.latency = latency
+        # Token generation rate; 0 means all tokens are produced instantly.
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.embedding_dimensions = embedding_dimensions
+        # Throttling: requests beyond these limits get a 429 (0 means unlimited).
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        # Fraction of admitted requests answered with a 500.
+        self.error_rate = error_rate
+        self.retry_after_ms = retry_after_ms
+        self.requests = {}
+        self.in_flight = 0
+        self._recent = []
+        self._lock = threading.Lock()
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def admit(self):
+        """Status for a new request: 200 (now in flight; call finish()), 429 or 500."""
+        with self._lock:
+            now = time.monotonic()
+            self._recent = [started for started in self._recent if now - started < 1.0]
+            if (self.max_concurrency and self.in_flight >= self.max_concurrency) or (
+                self.requests_per_second and len(self._recent) >= self.requests_per_second
+            ):
+                status = 429
+            elif self.error_rate and random.random() < self.error_rate:
+                status = 500
+            else:
+                self._recent.append(now)
+                self.in_flight += 1
+                return 200
+            self.requests[status] = self.requests.get(status, 0) + 1
+            return status
+
+    def finish(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _reply_for(prompt, completion_tokens):
+    if "mock interview questions" in prompt:
+        return MOCK_QUESTIONS
+    if "score out of 10" in prompt:
+        return "Clear structure and relevant examples; quantify the impact more. Score: 7/10"
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"]
+    return " ".join(words[i % len(words)] for i in range(completion_tokens))
+
+
+def _embedding(text, dimensions):
+    digest = hashlib.sha256(str(text).encode("utf-8")).digest()
+    return [((digest[i % len(digest)] + i) % 255) / 255.0 - 0.5 for i in range(dimensions)]
+
+
+def _prompt_tokens(text):
+    return max(1, len(str(text)) // 4)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = FakeOpenAIConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _intercept(self, body):
+        """Hook for subclasses to answer a request early (e.g. with an error). Returns True if handled."""
+        return False
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        body = self._read_json()
+        self.config.count(path)
+        if self._intercept(body):
+            return
+        status = self.config.admit()
+        if status == 429:
+            self._send_json({"error": {"message": "Rate limit reached", "type": "requests"}}, status=429,
+                            headers={"retry-after-ms": str(self.config.retry_after_ms)})
+            return
+        if status == 500:
+            self._send_json({"error": {"message": "The server had an error", "type": "server_error"}}, status=500)
+            return
+        try:
+            self._route(path, body)
+        finally:
+            self.config.finish()
+
+    def _route(self, path, body):
+        if path.endswith("/chat/completions"):
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+            self._complete(body, prompt, chat=True)
+        elif path.endswith("/completions"):
+            prompt = body.get("prompt", "")
+            prompt = "\n".join(prompt) if isinstance(prompt, list) else prompt
+            self._complete(body, prompt, chat=False)
+        elif path.endswith("/embeddings"):
+            self._embeddings(body)
+        else:
+            self._send_json({"error": {"message": f"Unknown path {path}"}}, status=404)
+
+    def _tokens(self, text):
+        return [word + " " for word in text.split(" ")]
+
+    def _complete(self, body, prompt, chat):
+        config = self.config
+        max_tokens = body.get("max_tokens") or config.completion_tokens
+        reply = _reply_for(prompt, min(max_tokens, config.completion_tokens))
+        tokens = self._tokens(reply)
+        usage = {
+            "prompt_tokens": _prompt_tokens(prompt),
+            "completion_tokens": len(tokens),
+            "total_tokens": _prompt_tokens(prompt) + len(tokens),
+        }
+        model = body.get("model", "fake")
+        time.sleep(config.latency)
+        delay = 1.0 / config.tokens_per_second if config.tokens_per_second else 0.0
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                if delay:
+                    time.sleep(delay)
+                if chat:
+                    choice = {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                    chunk = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model, "choices": [choice]}
+                else:
+                    choice = {"index": 0, "text": token, "finish_reason": None, "logprobs": None}
+                    chunk = {"id": "fake", "object": "text_completion", "created": int(time.time()),
+                             "model": model, "choices": [choice]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self._write_chunk("")
+            return
+
+        if delay:
+            time.sleep(delay * len(tokens))
+        if chat:
+            choice = {"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}
+            obj = "chat.completion"
+        else:
+            choice = {"index": 0, "text": reply, "finish_reason": "stop", "logprobs": None}
+            obj = "text_completion"
+        self._send_json({"id": "fake", "object": obj, "created": int(time.time()), "model": model,
+                         "choices": [choice], "usage": usage})
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _embeddings(self, body):
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        time.sleep(self.config.latency)
+        data = [
+            {"object": "embedding", "index": i, "embedding": _embedding(text, self.config.embedding_dimensions)}
+            for i, text in enumerate(inputs)
+        ]
+        tokens = sum(_prompt_tokens(text) for text in inputs)
+        self._send_json({"object": "list", "data": data, "model": body.get("model", "fake"),
+                         "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+
+@contextlib.contextmanager
+def running_fake_server(handler=FakeOpenAIHandler, port=0, **config):
+    """Run the fake API on a background thread; yields (base_url, config)."""
+    handler_class = type("ConfiguredFakeOpenAIHandler", (handler,), {"config": FakeOpenAIConfig(**config)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler_class)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/v1", handler_class.config
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--max-concurrency", type=int, default=0, help="429 beyond this many requests in flight")
+    parser.add_argument("--requests-per-second", type=float, default=0.0, help="429 beyond this request rate")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    args = parser.parse_args()
+
+    with running_fake_server(port=args.port, latency=args.latency, tokens_per_second=args.tokens_per_second,
+                             completion_tokens=args.completion_tokens, max_concurrency=args.max_concurrency,
+                             requests_per_second=args.requests_per_second,
+                             error_rate=args.error_rate) as (base_url, _):
+        print(f"Fake OpenAI API listening on {base_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
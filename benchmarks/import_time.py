@@ -0,0 +1,102 @@
+"""
+Cold-start cost of the app: module import times and Streamlit render times.
+
+Every measurement runs in a fresh interpreter so nothing is already
+imported. Import times come from `python -X importtime`; render times use
+Streamlit's AppTest to run a script once (first page) and again (rerun).
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --modules app utils.voice_utils --output import_time.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = [
+    "streamlit", "app", "streamlit_app", "utils.llm_utils", "utils.file_processing",
+    "utils.voice_utils", "src.file_upload_rag",
+]
+DEFAULT_SCRIPTS = ["app.py", "streamlit_app.py"]
+HEAVY_PACKAGES = ["speech_recognition", "langchain", "langchain_community", "PyPDF2", "docx", "faiss", "openai"]
+
+_RENDER_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+loaded = [name for name in sys.argv[2:] if name in sys.modules]
+print(json.dumps({"first_run": first, "rerun": rerun, "heavy_modules_loaded": loaded}))
+"""
+
+
+def _environment():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def measure_import(module):
+    """Cumulative import time of `module` (s) and the heavy packages it pulled in."""
+    code = f"import sys, json; import {module}; print(json.dumps([n for n in {HEAVY_PACKAGES!r} if n in sys.modules]))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, env=_environment(), capture_output=True, text=True, check=True,
+    )
+    cumulative = None
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if parts[2] == module:
+            cumulative = int(parts[1]) / 1e6
+    return {"seconds": cumulative, "heavy_modules_loaded": json.loads(result.stdout.strip().splitlines()[-1])}
+
+
+def measure_render(script):
+    result = subprocess.run(
+        [sys.executable, "-c", _RENDER_SNIPPET, os.path.join(PROJECT_ROOT, script), *HEAVY_PACKAGES],
+        cwd=PROJECT_ROOT, env=_environment(), capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--scripts", nargs="*", default=DEFAULT_SCRIPTS)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per measurement; the minimum is kept")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"imports": {}, "renders": {}}
+    for module in args.modules:
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["seconds"] or float("inf"))
+        results["imports"][module] = best
+        print(f"import {module:<28} {best['seconds'] * 1000:>9.1f} ms  heavy: {', '.join(best['heavy_modules_loaded']) or '-'}")
+
+    for script in args.scripts:
+        runs = [measure_render(script) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["first_run"])
+        best["rerun"] = min(run["rerun"] for run in runs)
+        results["renders"][script] = best
+        print(f"render {script:<28} first {best['first_run'] * 1000:>9.1f} ms  rerun {best['rerun'] * 1000:>8.1f} ms  "
+              f"heavy: {', '.join(best['heavy_modules_loaded']) or '-'}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
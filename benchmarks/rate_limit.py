@@ -0,0 +1,102 @@
+"""
+Load test of the shared rate limiter against the fake API in throttling mode.
+
+Fires a burst of batch requests and, shortly after, a handful of interactive
+ones at a fake server that answers 429 above --server-concurrency requests in
+flight. Runs once with plain SDK calls (no retries, no scheduling) and once
+through the RateLimiter, and reports failures, 429s seen, throughput and the
+latency of each priority class.
+
+    python -m benchmarks.rate_limit
+    python -m benchmarks.rate_limit --batch 200 --interactive 20 --server-concurrency 8 --error-rate 0.02
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_openai import running_fake_server
+from utils.rate_limiter import BATCH, INTERACTIVE, RateLimiter, ScheduledResource, scheduling_priority
+
+MODEL = "gpt-3.5-turbo"
+
+
+def _request(resource, priority, index):
+    start = time.perf_counter()
+    try:
+        with scheduling_priority(priority):
+            resource.create(model=MODEL, messages=[{"role": "user", "content": f"Request {index}"}], max_tokens=20)
+        error = None
+    except Exception as e:
+        error = type(e).__name__
+    return priority, time.perf_counter() - start, error
+
+
+def run_scenario(base_url, scheduled, batch, interactive, threads, limits):
+    import openai
+
+    client = openai.OpenAI(api_key="fake", base_url=base_url, max_retries=0)
+    limiter = RateLimiter(limits) if scheduled else None
+    resource = ScheduledResource(client.chat.completions, limiter) if scheduled else client.chat.completions
+    results = []
+    lock = threading.Lock()
+
+    def task(priority, index):
+        result = _request(resource, priority, index)
+        with lock:
+            results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for index in range(batch):
+            executor.submit(task, BATCH, index)
+        # Interactive work arrives while the batch backlog is queued.
+        time.sleep(0.05)
+        for index in range(interactive):
+            executor.submit(task, INTERACTIVE, index)
+    elapsed = time.perf_counter() - start
+
+    summary = {"elapsed_seconds": round(elapsed, 2), "requests_per_second": round(len(results) / elapsed, 1)}
+    for name, level in (("batch", BATCH), ("interactive", INTERACTIVE)):
+        latencies = [seconds for priority, seconds, error in results if priority == level and error is None]
+        summary[name] = {
+            "ok": len(latencies),
+            "failed": sum(1 for priority, _, error in results if priority == level and error is not None),
+            "median_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        }
+    if limiter is not None:
+        summary["limiter"] = limiter.snapshot()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--interactive", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=32, help="Client threads issuing requests")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--server-concurrency", type=int, default=6, help="Fake server 429s above this")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Limiter's starting concurrency")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    limits = {"requests_per_minute": 0, "tokens_per_minute": 0, "max_concurrency": args.max_concurrency}
+    results = {}
+    for scheduled in (False, True):
+        name = "scheduled" if scheduled else "direct"
+        with running_fake_server(latency=args.latency, max_concurrency=args.server_concurrency,
+                                 error_rate=args.error_rate) as (base_url, config):
+            results[name] = run_scenario(base_url, scheduled, args.batch, args.interactive, args.threads, limits)
+            results[name]["server_429"] = config.requests.get(429, 0)
+            results[name]["server_500"] = config.requests.get(500, 0)
+        print(f"{name}: {json.dumps(results[name])}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Offline benchmark suite for the app's hot paths.
+
+Starts the fake OpenAI server from benchmarks.fake_openai, points the real
+clients at it through OPENAI_API_BASE and times:
+
+  extract/*    extract_text_from_file on PDF/DOCX/TXT corpora (cold and cached)
+  parse/*      parse_questions on generated question lists
+  db/*         save_progress, save_progress_batch, ProgressWriter and get_progress
+  rag/*        file_upload_app_rag's pipeline: chunk + embed + index, then retrieve + answer
+  combined/*   process_combined_files_with_job_content's pipeline: parallel
+               extraction, prompt planning (direct or map-reduce) and a streamed answer
+
+Results are written as JSON, by default to benchmarks/results/<commit>.json,
+so two commits can be compared with benchmarks.compare.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --only extract rag --repeat 5
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from langchain_core.embeddings import Embeddings
+from benchmarks.corpus import SIZES, job_description, make_upload
+from benchmarks.fake_openai import MOCK_QUESTIONS, running_fake_server
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+API_KEY = "benchmark-key"
+GROUPS = ("extract", "parse", "db", "rag", "combined")
+
+
+def timed(function, repeat, setup=None):
+    """Run `function` `repeat` times (after `setup`, which is not timed) and summarize wall time."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "mean": round(statistics.fmean(samples), 6),
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+class OfflineEmbeddings(Embeddings):
+    """
+    Sends OpenAIEmbeddings' requests through its own SDK client, skipping the
+    tiktoken pre-tokenization that needs BPE files downloaded from the internet.
+    Chunks are token-bounded already, so the requests are the same size.
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts):
+        response = self.embeddings.client.create(input=texts, model=self.embeddings.model)
+        return [item.embedding for item in response.data]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def bench_extract(results, sizes, repeat):
+    from utils.file_processing import extract_text_from_file, get_extraction_cache
+
+    cache = get_extraction_cache()
+    for size in sizes:
+        for kind in ("pdf", "docx", "txt"):
+            upload = make_upload(kind, size)
+
+            def extract():
+                upload.seek(0)
+                extract_text_from_file(upload)
+
+            results[f"extract/{kind}/{size}/cold"] = timed(extract, repeat, setup=cache.clear)
+            results[f"extract/{kind}/{size}/cached"] = timed(extract, repeat)
+
+
+def bench_parse(results, repeat):
+    from utils.llm_utils import parse_questions
+
+    for count in (5, 50, 500):
+        behavioral = "\n".join(f"  {i}. Tell me about challenge number {i}." for i in range(1, count + 1))
+        technical = "\n".join(f"  {i}. Explain design decision number {i}." for i in range(1, count + 1))
+        text = f"- Behavioral Questions:\n{behavioral}\n- Technical Questions:\n{technical}"
+        results[f"parse/questions/{count * 2}"] = timed(lambda: parse_questions(text), repeat * 10)
+    results["parse/questions/model_reply"] = timed(lambda: parse_questions(MOCK_QUESTIONS), repeat * 10)
+
+
+def bench_db(results, repeat, rows=200):
+    from utils.database_utils import (
+        ProgressWriter, close_connection, create_database, get_progress, save_progress, save_progress_batch
+    )
+
+    root = tempfile.mkdtemp(prefix="bench_db_")
+    records = [
+        {"question": f"Question {i}", "answer": "An answer " * 20, "feedback": "Good. Score: 7/10",
+         "score": 7, "user_id": f"user{i % 4}", "session_id": "bench", "category": "Technical"}
+        for i in range(rows)
+    ]
+    paths = []
+
+    def fresh_db():
+        path = os.path.join(root, f"progress_{len(paths)}.db")
+        paths.append(path)
+        create_database(path)
+
+    def save_each():
+        for record in records:
+            save_progress(db_path=paths[-1], **record)
+
+    def save_batch():
+        save_progress_batch(records, db_path=paths[-1])
+
+    def writer_batch():
+        writer = ProgressWriter(paths[-1])
+        writer.submit_many(records)
+        writer.flush()
+        writer.close()
+
+    results[f"db/save_progress/{rows}"] = timed(save_each, repeat, setup=fresh_db)
+    results[f"db/save_progress_batch/{rows}"] = timed(save_batch, repeat, setup=fresh_db)
+    results[f"db/progress_writer/{rows}"] = timed(writer_batch, repeat, setup=fresh_db)
+    results["db/get_progress/page"] = timed(
+        lambda: get_progress(user_id="user1", limit=50, db_path=paths[-1]), repeat * 10
+    )
+    results["db/get_progress/all"] = timed(lambda: get_progress(limit=rows, db_path=paths[-1]), repeat * 10)
+
+    for path in paths:
+        close_connection(path)
+    shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_rag(results, sizes, repeat):
+    from langchain.chains import RetrievalQA
+    from src.file_upload_rag import load_file
+    from utils.chunking import CHUNK_SCHEME
+    from utils.embedding_cache import cached_embeddings
+    from utils.file_processing import content_key
+    from utils.llm_clients import get_embeddings
+    from utils.model_router import get_task_model
+    from utils.vector_store import PersistentVectorStore
+
+    root = tempfile.mkdtemp(prefix="bench_rag_")
+    base_embeddings = OfflineEmbeddings(get_embeddings(API_KEY))
+    llm = get_task_model("rag_answer", API_KEY, temperature=0.7, max_tokens=150)
+    calls = []
+    queries = {
+        "lookup": "Does the candidate know Snowflake?",
+        "open": "Summarize how this candidate has grown as an engineer and which teams benefited most",
+    }
+
+    for size in sizes:
+        for kind in ("pdf", "docx", "txt"):
+            upload = make_upload(kind, size)
+            doc_hash = content_key(upload.getbuffer(), upload.type, CHUNK_SCHEME)
+            state = {}
+
+            def fresh_store():
+                run_dir = tempfile.mkdtemp(dir=root)
+                embeddings = cached_embeddings(base_embeddings, os.path.join(run_dir, "embedding_cache.db"))
+                state["store"] = PersistentVectorStore(os.path.join(run_dir, "index"), embeddings)
+                upload.seek(0)
+
+            def index():
+                state["store"].add_documents(doc_hash, load_file(upload))
+
+            results[f"rag/{kind}/{size}/index"] = timed(index, repeat, setup=fresh_store)
+
+            for mode in ("vector", "hybrid", "auto"):
+                retriever = state["store"].as_retriever(doc_hash, k=4, mode=mode)
+                qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
+                for shape, query in queries.items():
+
+                    def retrieve():
+                        # Vary trailing whitespace so each call misses the query embedding cache
+                        calls.append(None)
+                        retriever.invoke(query + " " * len(calls))
+
+                    results[f"rag/{kind}/{size}/retrieve/{mode}/{shape}"] = timed(retrieve, repeat)
+
+                    def answer():
+                        retrieved_docs = retriever.invoke(query)
+                        combined_content = " ".join(doc.page_content for doc in retrieved_docs)
+                        qa_chain.combine_documents_chain.run(
+                            input_documents=retrieved_docs,
+                            question=f"Based on the following CV information:\n{combined_content}\n\n{query}",
+                        )
+
+                    results[f"rag/{kind}/{size}/query/{mode}/{shape}"] = timed(answer, repeat)
+
+    shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_combined(results, sizes, repeat):
+    from utils.file_processing import extract_texts_in_parallel, get_extraction_cache
+    from utils.llm_utils import stream_prediction
+    from utils.model_router import get_task_model
+    from utils.prompt_budget import (
+        build_direct_prompt, build_reduce_prompt, collapse_partials, map_partial_answers, plan_prompt
+    )
+
+    llm = get_task_model("file_qa", API_KEY)
+    job_content = job_description()
+    question = "How well does this candidate match the job?"
+
+    for size in sizes:
+        uploads = [make_upload(kind, size, seed) for seed, kind in enumerate(("pdf", "docx", "txt"))]
+        strategy = {}
+
+        def pipeline():
+            sections = [None] * len(uploads)
+            for index, text, error in extract_texts_in_parallel(uploads):
+                if error is not None:
+                    raise error
+                sections[index] = (uploads[index].name, text)
+            plan = plan_prompt(sections, job_content, question, llm.model_name)
+            strategy["name"] = plan["strategy"]
+            if plan["strategy"] == "direct":
+                prompt = build_direct_prompt(sections, job_content, question)
+            else:
+                partials, _ = map_partial_answers(llm, sections, job_content, question, plan["budget"])
+                partials, _ = collapse_partials(llm, partials, job_content, question, plan["budget"])
+                prompt = build_reduce_prompt(partials, job_content, question)
+            "".join(stream_prediction(llm, prompt))
+
+        result = timed(pipeline, repeat, setup=get_extraction_cache().clear)
+        result["strategy"] = strategy["name"]
+        results[f"combined/{size}"] = result
+
+
+# The fake server has no quotas; the client-side limiter keeps only a concurrency cap
+# (above the app's own worker pools) so results don't depend on config.yaml's rate_limits.
+BENCHMARK_LIMITS = {"requests_per_minute": 0, "tokens_per_minute": 0, "max_concurrency": 64}
+
+
+def run(groups, sizes, repeat, latency, tokens_per_second):
+    from utils.rate_limiter import configure_rate_limits
+    from utils.response_cache import disable_response_cache
+
+    # Measure the work itself, not hits from a response cache left on by the environment.
+    disable_response_cache()
+    configure_rate_limits(**BENCHMARK_LIMITS)
+    results = {}
+    with running_fake_server(latency=latency, tokens_per_second=tokens_per_second) as (base_url, server):
+        os.environ["OPENAI_API_BASE"] = base_url
+        for group in groups:
+            started = time.perf_counter()
+            if group == "extract":
+                bench_extract(results, sizes, repeat)
+            elif group == "parse":
+                bench_parse(results, repeat)
+            elif group == "db":
+                bench_db(results, repeat)
+            elif group == "rag":
+                bench_rag(results, sizes, repeat)
+            elif group == "combined":
+                bench_combined(results, sizes, repeat)
+            print(f"{group:>9}: {time.perf_counter() - started:.2f}s")
+        requests = dict(server.requests)
+    return results, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="Benchmark groups to run")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake API latency per request (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Fake API generation rate")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    results, requests = run(args.only, args.sizes, args.repeat, args.latency, args.tokens_per_second)
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "sizes": args.sizes, "repeat": args.repeat,
+            "latency": args.latency, "tokens_per_second": args.tokens_per_second,
+            "rate_limits": BENCHMARK_LIMITS,
+        },
+        "api_requests": requests,
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:<40} median {result['median'] * 1000:>10.2f} ms  min {result['min'] * 1000:>10.2f} ms")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Load test for concurrent Streamlit sessions.
+
+Streamlit serves every browser session from a thread in one process, so N
+sessions are simulated with N threads. Each session uploads its own CV,
+extracts it, indexes it, asks a few questions and stores progress.
+
+Two layouts are compared:
+  shared    - every session writes into one global FAISS index (the old layout)
+  isolated  - each document gets its own index directory, as in utils.session
+
+Embedding calls sleep for a configurable time to stand in for API latency.
+
+    python -m benchmarks.session_load --sessions 1 2 4 8 16
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from langchain_core.embeddings import Embeddings
+from utils.chunking import CHUNK_SCHEME, chunk_text
+from utils.database_utils import ProgressWriter, create_database
+from utils.file_processing import TXT_TYPE, content_key, extract_text_from_file
+from utils.vector_store import PersistentVectorStore
+
+DIMENSIONS = 64
+
+
+class SlowFakeEmbeddings(Embeddings):
+    """Deterministic embeddings with a fixed per-request delay."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def _vector(self, text):
+        vector = [0.0] * DIMENSIONS
+        for word in text.split():
+            vector[hash(word) % DIMENSIONS] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return self._vector(text)
+
+
+class FakeUpload(io.BytesIO):
+    def __init__(self, data, name, file_type=TXT_TYPE):
+        super().__init__(data)
+        self.name = name
+        self.type = file_type
+
+
+def synthetic_cv(seed, paragraphs=40):
+    lines = [f"Candidate {seed}"]
+    for i in range(paragraphs):
+        lines.append(
+            f"Role {i} at Company {seed}-{i}: built data pipelines, Kubernetes deployments, "
+            f"Python services and dashboards; led a team of {i % 7 + 2} engineers."
+        )
+    return "\n".join(lines).encode("utf-8")
+
+
+def run_session(session_index, layout, root, embeddings, writer, shared_store, questions):
+    upload = FakeUpload(synthetic_cv(session_index), f"cv_{session_index}.txt")
+    text = extract_text_from_file(upload)
+    doc_hash = content_key(upload.getbuffer(), upload.type, CHUNK_SCHEME)
+    if layout == "shared":
+        store = shared_store
+    else:
+        store = PersistentVectorStore(os.path.join(root, doc_hash), embeddings)
+    store.add_documents(doc_hash, chunk_text(text, {"source": upload.name}))
+    retriever = store.as_retriever(doc_hash, k=4)
+    for question in range(questions):
+        retriever.invoke(f"session {session_index} question {question} about Kubernetes")
+        writer.submit({
+            "question": f"q{question}", "answer": "answer", "feedback": "Score: 7/10", "score": 7,
+            "user_id": f"user{session_index}", "session_id": f"session{session_index}", "category": "Technical",
+        })
+
+
+def run(layout, sessions, latency, questions):
+    root = tempfile.mkdtemp(prefix=f"session_load_{layout}_")
+    db_path = os.path.join(root, "progress.db")
+    create_database(db_path)
+    writer = ProgressWriter(db_path)
+    embeddings = SlowFakeEmbeddings(latency)
+    shared_store = PersistentVectorStore(os.path.join(root, "shared"), embeddings)
+
+    threads = [
+        threading.Thread(
+            target=run_session,
+            args=(index, layout, root, embeddings, writer, shared_store, questions),
+        )
+        for index in range(sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.close()
+    return {
+        "layout": layout,
+        "sessions": sessions,
+        "seconds": round(elapsed, 4),
+        "sessions_per_second": round(sessions / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated embedding API latency (s)")
+    parser.add_argument("--questions", type=int, default=3, help="Questions asked per session")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for layout in ("shared", "isolated"):
+        for sessions in args.sessions:
+            result = run(layout, sessions, args.latency, args.questions)
+            results.append(result)
+            print(f"{layout:>8}  sessions={sessions:<3}  {result['seconds']:>7.3f}s  "
+                  f"{result['sessions_per_second']:>7.2f} sessions/s")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Headless bulk mode: customize many resumes against many job descriptions.
+
+Inputs are either two folders (every resume is paired with every job
+description) or a CSV manifest with `resume`, `job` and optional `job_title`
+columns (paths relative to the manifest). Documents are extracted in the
+shared process pool, LLM calls run on a bounded worker pool, and every result
+is appended to a JSONL file as soon as it finishes. Re-running with the same
+output file skips pairs that already completed, so an interrupted run resumes.
+
+    python -m src.batch_customize --resumes cohort/resumes --jobs cohort/jobs --output results.jsonl
+    python -m src.batch_customize --manifest cohort.csv --output results.jsonl --questions --workers 8
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.config import load_config
+from utils.file_processing import DOCX_TYPE, PDF_TYPE, TXT_TYPE, content_key, extract_texts_in_parallel
+from utils.llm_utils import customize_resume, generate_mock_questions, parse_questions
+from utils.rate_limiter import BATCH, scheduling_priority
+from utils.resume_matching import match_resume
+
+FILE_TYPES = {".pdf": PDF_TYPE, ".docx": DOCX_TYPE, ".txt": TXT_TYPE}
+PROGRESS_EVERY = 10
+
+
+class FileUpload(io.BytesIO):
+    """A file on disk presented like Streamlit's UploadedFile."""
+
+    def __init__(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in FILE_TYPES:
+            raise ValueError(f"Unsupported file type {extension or '(none)'}; use PDF, DOCX or TXT")
+        with open(path, "rb") as file:
+            super().__init__(file.read())
+        self.name = path
+        self.type = FILE_TYPES[extension]
+
+
+def _documents_in(folder):
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if os.path.splitext(name)[1].lower() in FILE_TYPES
+    )
+
+
+def read_pairs(resumes=None, jobs=None, manifest=None, log=sys.stderr):
+    """(resume_path, job_path, job_title or None) for every pair to process."""
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        pairs = []
+        with open(manifest, newline="") as file:
+            for line, row in enumerate(csv.DictReader(file), start=2):
+                if not (row.get("resume") or "").strip() or not (row.get("job") or "").strip():
+                    print(f"Skipping manifest line {line}: resume and job are both required", file=log)
+                    continue
+                pairs.append((
+                    os.path.join(base, row["resume"].strip()), os.path.join(base, row["job"].strip()),
+                    row.get("job_title") or None,
+                ))
+        return pairs
+    return [(resume, job, None) for resume in _documents_in(resumes) for job in _documents_in(jobs)]
+
+
+def extract_all(paths):
+    """
+    Extract every distinct path once in the process pool; returns ({path: text},
+    {path: error}, {path: hash}). Missing, unreadable or unsupported files are
+    reported as errors instead of stopping the run.
+    """
+    uploads, texts, errors = [], {}, {}
+    for path in paths:
+        try:
+            uploads.append(FileUpload(path))
+        except (OSError, ValueError) as e:
+            errors[path] = str(e)
+    for index, text, error in extract_texts_in_parallel(uploads):
+        if error is None:
+            texts[uploads[index].name] = text
+        else:
+            errors[uploads[index].name] = str(error)
+    hashes = {upload.name: content_key(upload.getbuffer(), upload.type) for upload in uploads}
+    return texts, errors, hashes
+
+
+def completed_keys(output):
+    """Keys of records in `output` that finished without an error."""
+    keys = set()
+    if not os.path.exists(output):
+        return keys
+    with open(output) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run; that task is redone.
+                continue
+            if record.get("status") == "ok":
+                keys.add(record["key"])
+    return keys
+
+
+def _job_title(job_text, job_title):
+    if job_title:
+        return job_title
+    return next((line.strip() for line in job_text.splitlines() if line.strip()), "the role")[:200]
+
+
+def customize_task(resume_path, job_path, resume_text, job_text, api_key, trim):
+    match = match_resume(resume_text, job_text) if trim else None
+    record = {"type": "customized_resume", "resume": resume_path, "job": job_path}
+    if match is not None:
+        record.update(original_tokens=match["original_tokens"], trimmed_tokens=match["trimmed_tokens"])
+    record["output"] = customize_resume(job_text, resume_text, api_key, match=match)
+    return record
+
+
+def questions_task(job_path, job_text, job_title, api_key):
+    title = _job_title(job_text, job_title)
+    generated = generate_mock_questions(title, api_key)
+    behavioral, technical = parse_questions(generated)
+    return {
+        "type": "mock_questions", "job": job_path, "job_title": title,
+        "behavioral": behavioral, "technical": technical, "output": generated,
+    }
+
+
+def _as_batch(function, *args):
+    # Worker threads start with the default (interactive) priority; batch calls queue behind the app's.
+    with scheduling_priority(BATCH):
+        return function(*args)
+
+
+def run(pairs, output, api_key, workers=4, questions=False, trim=False, log=sys.stderr):
+    """Process `pairs`, appending JSONL records to `output`; returns a summary dict."""
+    started = time.perf_counter()
+    paths = sorted({path for resume, job, _ in pairs for path in (resume, job)})
+    texts, extraction_errors, hashes = extract_all(paths)
+    extraction_seconds = time.perf_counter() - started
+    print(f"Extracted {len(texts)} documents in {extraction_seconds:.1f}s "
+          f"({len(extraction_errors)} failed)", file=log)
+
+    done = completed_keys(output)
+    tasks, skipped, extraction_failures = [], 0, 0
+    seen_jobs = set()
+    with open(output, "a") as out:
+
+        def write(record):
+            out.write(json.dumps(record) + "\n")
+            # Flushed per record so an interrupted run loses at most the tasks in flight.
+            out.flush()
+
+        for resume, job, job_title in pairs:
+            for path in (resume, job):
+                if path in extraction_errors:
+                    print(f"Skipping pairs with {path}: {extraction_errors[path]}", file=log)
+                    write({"type": "extraction", "key": f"extract:{path}", "path": path,
+                           "status": "error", "error": extraction_errors[path]})
+                    extraction_errors.pop(path)
+                    extraction_failures += 1
+            if resume not in texts or job not in texts:
+                continue
+            if questions and job not in seen_jobs:
+                seen_jobs.add(job)
+                key = f"questions:{hashes[job]}"
+                if key in done:
+                    skipped += 1
+                else:
+                    tasks.append((key, questions_task, (job, texts[job], job_title, api_key)))
+            # Trimmed and full-resume prompts give different results; resuming must not mix them.
+            key = f"{hashes[resume]}:{hashes[job]}" + (":trim" if trim else "")
+            if key in done:
+                skipped += 1
+            else:
+                tasks.append((key, customize_task, (resume, job, texts[resume], texts[job], api_key, trim)))
+
+        print(f"{len(tasks)} LLM tasks to run, {skipped} already completed", file=log)
+        finished, failed, tokens_saved = 0, 0, 0
+        llm_started = time.perf_counter()
+        pending = {}
+        queue = iter(tasks)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                # Keep a bounded number of tasks in flight instead of queueing the whole cohort.
+                while len(pending) < workers * 2:
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    key, function, args = item
+                    pending[executor.submit(_as_batch, function, *args)] = (key, time.perf_counter())
+                if not pending:
+                    break
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    key, submitted = pending.pop(future)
+                    try:
+                        record = future.result()
+                        record["status"] = "ok"
+                        tokens_saved += record.get("original_tokens", 0) - record.get("trimmed_tokens", 0)
+                    except Exception as e:
+                        record = {"status": "error", "error": str(e)}
+                        failed += 1
+                    record["key"] = key
+                    record["seconds"] = round(time.perf_counter() - submitted, 3)
+                    write(record)
+                    finished += 1
+                    if finished % PROGRESS_EVERY == 0 or finished == len(tasks):
+                        elapsed = time.perf_counter() - llm_started
+                        print(f"{finished}/{len(tasks)} done, {finished / elapsed * 60:.1f} tasks/min", file=log)
+
+    llm_seconds = time.perf_counter() - llm_started
+    return {
+        "tasks": len(tasks),
+        "completed": finished - failed,
+        "failed": failed,
+        "skipped": skipped,
+        "extraction_failures": extraction_failures,
+        "extraction_seconds": round(extraction_seconds, 2),
+        "llm_seconds": round(llm_seconds, 2),
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+        "tasks_per_minute": round(finished / llm_seconds * 60, 1) if finished else 0.0,
+        "resume_tokens_saved": tokens_saved,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="CSV with resume, job and optional job_title columns")
+    source.add_argument("--resumes", help="Folder of resumes (PDF, DOCX, TXT); requires --jobs")
+    parser.add_argument("--jobs", help="Folder of job descriptions (PDF, DOCX, TXT)")
+    parser.add_argument("--output", required=True, help="JSONL file to append results to")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--questions", action="store_true", help="Also generate mock questions once per job")
+    parser.add_argument(
+        "--trim", action="store_true",
+        help="Send only resume sections relevant to the job; the rest are appended unchanged",
+    )
+    parser.add_argument("--api-key", help="OpenAI API key (default: config/config.yaml)")
+    args = parser.parse_args()
+    if args.resumes and not args.jobs:
+        parser.error("--resumes requires --jobs")
+
+    api_key = args.api_key or load_config()
+    if not api_key:
+        parser.error("No OpenAI API key in config/config.yaml; pass --api-key")
+
+    pairs = read_pairs(args.resumes, args.jobs, args.manifest)
+    summary = run(pairs, args.output, api_key, args.workers, args.questions, args.trim)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
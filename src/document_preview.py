@@ -0,0 +1,29 @@
+import streamlit as st
+
+
+def document_preview(label, documents, key, height=150):
+    """
+    Paged, read-only view of DocumentHandles: one page of one document per
+    rerun, so the payload sent to the browser stays the same size however
+    large the uploads are.
+    """
+    if not documents:
+        st.text_area(label, "", height=height, disabled=True, key=f"{key}_empty")
+        return
+    index = 0
+    if len(documents) > 1:
+        names = [document.name for document in documents]
+        index = st.selectbox(f"{label} file", range(len(documents)), format_func=names.__getitem__, key=f"{key}_file")
+    document = documents[index]
+    pages = document.page_count()
+    page = 1
+    if pages > 1:
+        # One page selector per file, so switching files never keeps an out-of-range page.
+        page = st.number_input(
+            f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page_{index}"
+        )
+    st.caption(
+        f"{document.name} · {document.size / 1024:,.1f} KB · page {page} of {pages}"
+        + (" · stored on disk" if document.spilled else "")
+    )
+    st.text_area(label, document.page(page - 1), height=height, disabled=True)
@@ -1,41 +1,14 @@
-import os
 import streamlit as st
-from docx import Document
-from PyPDF2 import PdfReader
-from langchain.chat_models import ChatOpenAI
-import yaml
-
-
-def load_config(file_name="config.yaml"):
-    """
-    Load configuration file from the 'config/' directory, relative to the project root.
-    """
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    config_path = os.path.join(project_root, "config", file_name)
-
-    try:
-        with open(config_path, "r") as file:
-            return yaml.safe_load(file)['openai_api_key']
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Configuration file not found at {config_path}")
-
-
-def load_file(uploaded_file):
-    """
-    Load uploaded files into text format.
-    Supports PDF, DOCX, and TXT files.
-    """
-    if uploaded_file.type == "application/pdf":
-        reader = PdfReader(uploaded_file)
-        text = "".join([page.extract_text() for page in reader.pages])
-    elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        doc = Document(uploaded_file)
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()])
-    elif uploaded_file.type == "text/plain":
-        text = uploaded_file.read().decode("utf-8")
-    else:
-        raise ValueError("Unsupported file type")
-    return text
+from utils.config import load_config
+from utils.file_processing import extract_texts_in_parallel
+from utils.model_router import get_task_model
+from utils.llm_utils import stream_prediction
+from utils.chunking import count_tokens
+from utils.prompt_budget import (
+    build_direct_prompt, build_reduce_prompt, collapse_partials, map_partial_answers, plan_prompt
+)
+from utils.session import session_documents
+from src.document_preview import document_preview
 
 
 def process_combined_files_with_job_content():
@@ -57,34 +30,86 @@ def process_combined_files_with_job_content():
     if uploaded_files and openai_api_key:
         st.info("Processing all uploaded files together...")
 
-        combined_text = ""
-        for uploaded_file in uploaded_files:
-            try:
-                file_text = load_file(uploaded_file)
-                combined_text += f"\n\n--- Content from {uploaded_file.name} ---\n\n{file_text}"
-            except Exception as e:
-                st.error(f"Failed to load file '{uploaded_file.name}': {str(e)}")
-
-        if combined_text:
-            st.success("All files successfully loaded!")
-            st.text_area("Combined Content from All Files:", combined_text, height=100)
+        def load():
+            # Files are parsed concurrently; sections are slotted back in upload order.
+            sections = [None] * len(uploaded_files)
+            errors = []
+            progress = st.progress(0.0, text="Extracting text...")
+            results = extract_texts_in_parallel(uploaded_files)
+            for done, (index, file_text, error) in enumerate(results, start=1):
+                file_name = uploaded_files[index].name
+                if error is not None:
+                    # Shown as soon as the file fails; kept so later reruns can show it again.
+                    message = f"Failed to load file '{file_name}': {str(error)}"
+                    st.error(message)
+                    errors.append(message)
+                else:
+                    sections[index] = (file_name, file_text)
+                progress.progress(done / len(uploaded_files), text=f"Processed {file_name} ({done}/{len(uploaded_files)})")
+            st.session_state.upload_errors = errors
+            return [section for section in sections if section]
+
+        # Extracted once per set of uploads and kept as DocumentHandles; reruns only send a preview page.
+        source = tuple(file.file_id for file in uploaded_files)
+        loaded_now = st.session_state.get("combined_documents", (None,))[0] != source
+        documents = session_documents("combined_documents", source, load)
+        upload_errors = st.session_state.get("upload_errors", [])
+        if not loaded_now:
+            # load() already showed these while extracting on the run that loaded the files.
+            for message in upload_errors:
+                st.error(message)
+
+        if documents:
+            if upload_errors:
+                st.warning(f"Loaded {len(documents)} of {len(uploaded_files)} files; the others failed.")
+            else:
+                st.success("All files successfully loaded!")
+            document_preview("Combined Content from All Files:", documents, key="combined_preview", height=100)
 
             user_question = st.text_area("Ask a question about the content:", height=100)
 
             if st.button("Get Answer"):
-                llm = ChatOpenAI(model_name='gpt-4', openai_api_key=openai_api_key)
+                llm = get_task_model("file_qa", openai_api_key)
+                sections = [(document.name, document.text()) for document in documents]
 
                 try:
-                    # Prepare the prompt
-                    prompt = f"Using the following combined content, answer the user's question."
-                    if job_content.strip():
-                        prompt += f"\n\nJob Content:\n{job_content}"
-                    prompt += f"\n\nCombined Content from Files:\n{combined_text}\n\nQuestion: {user_question}"
-
-                    # Generate response
-                    response = llm.predict(prompt)
-
-                    st.text_area("Answer:", response, height=300)
+                    # Send everything at once if it fits the context window, otherwise map-reduce per file
+                    plan = plan_prompt(sections, job_content, user_question, llm.model_name)
+                    if plan["strategy"] == "direct":
+                        prompt = build_direct_prompt(sections, job_content, user_question)
+                        usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+                    else:
+                        with st.spinner(
+                            f"Content is {plan['direct_prompt_tokens']} tokens, over the {plan['budget']} token "
+                            "budget. Answering per file first..."
+                        ):
+                            partials, usage = map_partial_answers(
+                                llm, sections, job_content, user_question, plan["budget"]
+                            )
+                            partials, merge_usage = collapse_partials(
+                                llm, partials, job_content, user_question, plan["budget"]
+                            )
+                        if merge_usage.pop("truncated"):
+                            st.warning(
+                                "The per-file notes were still too long to combine, so they were shortened "
+                                "to fit the model's context window; the answer may miss some details."
+                            )
+                        for key, value in merge_usage.items():
+                            usage[key] += value
+                        prompt = build_reduce_prompt(partials, job_content, user_question)
+
+                    # Stream the response so the first tokens show up immediately
+                    st.subheader("Answer")
+                    answer = st.write_stream(stream_prediction(llm, prompt))
+                    st.session_state.combined_answer = answer
+
+                    usage["calls"] += 1
+                    usage["prompt_tokens"] += count_tokens(prompt)
+                    usage["completion_tokens"] += count_tokens(answer)
+                    st.caption(
+                        f"Strategy: {plan['strategy']} · {usage['calls']} LLM call(s) · "
+                        f"{usage['prompt_tokens']} prompt tokens · {usage['completion_tokens']} completion tokens"
+                    )
                 except Exception as e:
                     st.error(f"Failed to generate response: {str(e)}")
 
@@ -1,58 +1,44 @@
-import os
 import streamlit as st
-from langchain.chains import RetrievalQA
-from langchain.document_loaders import PyPDFLoader
-from langchain.vectorstores import FAISS
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.llms import OpenAI
-from docx import Document
-import yaml
+from utils.chunking import CHUNK_SCHEME, iter_chunks
+from utils.config import load_config
+from utils.file_processing import (
+    DOCX_TYPE, PDF_TYPE, TXT_TYPE, content_key, iter_docx_pages, iter_pdf_pages, iter_txt_pages
+)
+from utils.model_router import get_task_model
+from utils.metrics import span
+from utils.session import shared_vector_store
 
-import yaml
-import os
-
-
-def load_config(file_name="config.yaml"):
-    """
-    Load configuration file from the 'config/' directory, relative to the project root.
-    """
-    # Determine the project root dynamically
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    # Build the path to the config file
-    config_path = os.path.join(project_root, "config", file_name)
-
-    try:
-        with open(config_path, "r") as file:
-            return yaml.safe_load(file)['openai_api_key']
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Configuration file not found at {config_path}")
 
 def load_file(uploaded_file):
     """
-    Load uploaded files into a LangChain-compatible loader.
-    Supports PDF, DOCX, and TXT files.
+    Lazily load an uploaded file (PDF, DOCX, TXT) as token-bounded LangChain
+    Documents. Pages are parsed and chunked as the consumer asks for them,
+    with the page and byte caps of utils.file_processing.
     """
-    if uploaded_file.type == "application/pdf":
-        # Save PDF temporarily and load it
-        with open("temp.pdf", "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        loader = PyPDFLoader("temp.pdf")
-        documents = loader.load()
-    elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        # Process DOCX file
-        doc = Document(uploaded_file)
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()])
-        documents = [{"content": text, "metadata": {}}]
-    elif uploaded_file.type == "text/plain":
-        # Process plain text file
-        text = uploaded_file.read().decode("utf-8")
-        documents = [{"content": text, "metadata": {}}]
+    from langchain_core.documents import Document as LangchainDocument
+
+    if uploaded_file.type == PDF_TYPE:
+        documents = (
+            LangchainDocument(page_content=text, metadata={"source": uploaded_file.name, "page": page_number})
+            for page_number, text in iter_pdf_pages(uploaded_file)
+        )
+    elif uploaded_file.type in (DOCX_TYPE, TXT_TYPE):
+        # DOCX/TXT "pages" are size-based, so they are not recorded as page numbers
+        pages = iter_docx_pages if uploaded_file.type == DOCX_TYPE else iter_txt_pages
+        documents = (
+            LangchainDocument(page_content=text, metadata={"source": uploaded_file.name})
+            for _, text in pages(uploaded_file)
+        )
     else:
         raise ValueError("Unsupported file type")
-    return documents
+    return iter_chunks(documents)
 
 
 def file_upload_app_rag():
+    # LangChain is only loaded once this page is opened
+    from langchain.chains import RetrievalQA
+    from utils.vector_store import RETRIEVAL_MODES
+
     st.title("📄 Upload File and Use RAG")
 
     # Read API key from config file
@@ -70,27 +56,32 @@ def file_upload_app_rag():
     if uploaded_file and openai_api_key:
         st.info("Processing the file...")
 
-        try:
-            # Load and process the uploaded file
-            documents = load_file(uploaded_file)
-            st.success("File successfully loaded!")
-        except Exception as e:
-            st.error(f"Failed to load file: {str(e)}")
-            return
-
-        # Embed documents and set up vector store
-        embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
-        vectorstore = FAISS.from_documents(documents, embeddings)
+        # Only parse and embed content the persistent index has not seen yet.
+        doc_hash = content_key(uploaded_file.getbuffer(), uploaded_file.type, CHUNK_SCHEME)
+        vectorstore = shared_vector_store(doc_hash, openai_api_key)
 
-        # Save vectorstore to disk (optional, for reuse)
-        vectorstore.save_local("local_vectorstore")
-
-        # Load vectorstore from disk (for demonstration of persistence)
-        vectorstore = FAISS.load_local("local_vectorstore", embeddings, allow_dangerous_deserialization=True)
+        if vectorstore.contains(doc_hash):
+            st.success("File already indexed, reusing stored embeddings.")
+        else:
+            try:
+                # Chunks are embedded batch by batch while the file is still being parsed
+                vectorstore.add_documents(doc_hash, load_file(uploaded_file))
+                st.success("File successfully loaded!")
+            except Exception as e:
+                st.error(f"Failed to load file: {str(e)}")
+                return
+
+        stats = vectorstore.embeddings.cache.stats()
+        st.sidebar.caption(
+            f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate)"
+        )
 
         # Create RAG chain
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 1})  # Reduce the number of retrieved chunks
-        llm = OpenAI(temperature=0.7, max_tokens=150, openai_api_key=openai_api_key)  # Limit response length
+        # "auto" answers exact-term lookups from the keyword index without an embedding call
+        retrieval_mode = st.sidebar.selectbox("Retrieval mode", RETRIEVAL_MODES)
+        retriever = vectorstore.as_retriever(doc_hash, k=4, mode=retrieval_mode)  # A few small chunks rather than one whole page
+        llm = get_task_model("rag_answer", openai_api_key, temperature=0.7, max_tokens=150)  # Limit response length
 
         qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
 
@@ -99,7 +90,8 @@ def file_upload_app_rag():
         if st.button("Get Answer"):
             if query.strip():
                 try:
-                    retrieved_docs = retriever.get_relevant_documents(query)
+                    with span("retrieve", mode=retrieval_mode):
+                        retrieved_docs = retriever.get_relevant_documents(query)
                     # Combine and clean retrieved content
                     combined_content = " ".join([doc.page_content for doc in retrieved_docs])
 
@@ -112,7 +104,12 @@ def file_upload_app_rag():
                     """
                     st.text_area("Debug Prompt", structured_prompt)
 
-                    response = qa_chain.run(structured_prompt)
+                    # Answer from the chunks retrieved above instead of searching again
+                    # with the whole prompt, which would always need an embedding call
+                    with span("rag_chain", model=llm.model_name):
+                        response = qa_chain.combine_documents_chain.run(
+                            input_documents=retrieved_docs, question=structured_prompt
+                        )
                     st.success(response)
                 except Exception as e:
                     st.error(f"Failed to generate a response: {str(e)}")
@@ -0,0 +1,41 @@
+import streamlit as st
+from utils.metrics import get_registry, metrics_enabled
+
+
+def metrics_debug_panel():
+    """Sidebar panel with stage timings, token usage and exports; shown only while metrics are enabled."""
+    if not metrics_enabled():
+        return
+    registry = get_registry()
+
+    with st.sidebar.expander("Debug: metrics"):
+        spans = registry.span_summary()
+        if spans:
+            st.dataframe(
+                [
+                    {
+                        "stage": item["span"],
+                        "labels": ", ".join(f"{key}={value}" for key, value in item["labels"].items()),
+                        "count": item["count"],
+                        "mean ms": round(item["mean_seconds"] * 1000, 1),
+                        "max ms": round(item["max_seconds"] * 1000, 1),
+                        "errors": item["errors"],
+                    }
+                    for item in spans
+                ],
+                use_container_width=True,
+            )
+        else:
+            st.caption("No timings recorded yet.")
+
+        tokens = registry.token_summary()
+        if tokens:
+            st.dataframe(
+                [{"model": model, **counts} for model, counts in sorted(tokens.items())],
+                use_container_width=True,
+            )
+
+        st.download_button("Download JSONL", registry.to_jsonl(), file_name="metrics.jsonl")
+        st.download_button("Download Prometheus text", registry.to_prometheus(), file_name="metrics.prom")
+        if st.button("Reset metrics"):
+            registry.clear()
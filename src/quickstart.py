@@ -1,23 +1,7 @@
 import streamlit as st
-from langchain.llms import OpenAI
-import yaml
-import os
-
-def load_config(file_name="config.yaml"):
-    """
-    Load configuration file from the 'config/' directory, relative to the project root.
-    """
-    # Determine the project root dynamically
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    # Build the path to the config file
-    config_path = os.path.join(project_root, "config", file_name)
-
-    try:
-        with open(config_path, "r") as file:
-            return yaml.safe_load(file)['openai_api_key']
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Configuration file not found at {config_path}")
-
+from utils.config import load_config
+from utils.llm_utils import predict_with_cache
+from utils.model_router import get_task_model
 
 
 def quickstart_app():
@@ -37,8 +21,9 @@ def quickstart_app():
             st.info("API key loaded from config file.")
 
     def generate_response(input_text):
-        llm = OpenAI(temperature=0.7, openai_api_key=openai_api_key)
-        st.info(llm(input_text))
+        llm = get_task_model("quickstart", openai_api_key, temperature=0.7)
+        # predict returns text for both chat and completion tiers
+        st.info(predict_with_cache(llm, input_text))
 
     with st.form("my_form"):
         text = st.text_area("Enter text:", "What are 3 key advice for learning how to code?")
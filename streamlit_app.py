@@ -1,6 +1,7 @@
 import streamlit as st
 from src.quickstart import quickstart_app
 from src.file_upload import process_combined_files_with_job_content
+from src.metrics_panel import metrics_debug_panel
 
 # Set up navigation
 st.sidebar.title("Navigation")
@@ -10,4 +11,6 @@ app_mode = st.sidebar.radio("Go to", ["Quickstart App", "Upload & RAG"])
 if app_mode == "Quickstart App":
     quickstart_app()
 elif app_mode == "Upload & RAG":
-    process_combined_files_with_job_content()
\ No newline at end of file
+    process_combined_files_with_job_content()
+
+metrics_debug_panel()
\ No newline at end of file
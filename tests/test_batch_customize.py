@@ -0,0 +1,50 @@
+import io
+import json
+import src.batch_customize as batch_customize
+from src.batch_customize import read_pairs, run
+
+
+def _fake_customize(job_text, resume_text, api_key, match=None):
+    return f"{'trimmed' if match else 'full'}: {resume_text.strip()}"
+
+
+def test_bad_manifest_rows_are_reported_and_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_customize, "customize_resume", _fake_customize)
+    (tmp_path / "resume.txt").write_text("Jane Doe\nPython developer")
+    (tmp_path / "job.txt").write_text("Python developer wanted")
+    (tmp_path / "notes.rtf").write_text("not supported")
+    manifest = tmp_path / "cohort.csv"
+    manifest.write_text(
+        "resume,job\n"
+        "resume.txt,job.txt\n"
+        "missing.txt,job.txt\n"
+        "notes.rtf,job.txt\n"
+        ",job.txt\n"
+    )
+    log = io.StringIO()
+    output = tmp_path / "results.jsonl"
+
+    pairs = read_pairs(manifest=str(manifest), log=log)
+    assert len(pairs) == 3
+    summary = run(pairs, str(output), "key", workers=1, log=log)
+
+    assert summary["completed"] == 1
+    assert summary["extraction_failures"] == 2
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    errors = {record["path"].rsplit("/", 1)[-1]: record["error"] for record in records if record["type"] == "extraction"}
+    assert set(errors) == {"missing.txt", "notes.rtf"}
+    assert "Unsupported file type .rtf" in errors["notes.rtf"]
+    assert "manifest line 5" in log.getvalue()
+
+
+def test_resume_key_includes_trim_option(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_customize, "customize_resume", _fake_customize)
+    (tmp_path / "resume.txt").write_text("EXPERIENCE\nPython pipelines\n\nHOBBIES\nSailing")
+    (tmp_path / "job.txt").write_text("Python pipelines")
+    pairs = [(str(tmp_path / "resume.txt"), str(tmp_path / "job.txt"), None)]
+    output = str(tmp_path / "results.jsonl")
+
+    assert run(pairs, output, "key", workers=1, log=io.StringIO())["completed"] == 1
+    # A trimmed run is a different task, not a resumed one.
+    assert run(pairs, output, "key", workers=1, trim=True, log=io.StringIO())["completed"] == 1
+    assert run(pairs, output, "key", workers=1, trim=True, log=io.StringIO())["skipped"] == 1
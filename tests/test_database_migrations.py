@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+import pytest
+from utils import database_utils
+
+
+def _baseline(path):
+    conn = sqlite3.connect(path)
+    conn.execute(database_utils.MIGRATIONS[0][0])
+    conn.execute("PRAGMA user_version = 1")
+    conn.execute("INSERT INTO progress (question, answer, feedback, score) VALUES ('q', 'a', 'f', 5)")
+    conn.commit()
+    conn.close()
+
+
+def _version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_concurrent_first_runs_migrate_once(tmp_path):
+    path = str(tmp_path / "progress.db")
+    _baseline(path)
+    errors = []
+
+    def migrate():
+        # A separate connection per thread stands in for separate processes.
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            while database_utils._apply_next_migration(conn):
+                pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=migrate) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert _version(path) == len(database_utils.MIGRATIONS)
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    path = str(tmp_path / "progress.db")
+    _baseline(path)
+    broken = [database_utils.MIGRATIONS[0], database_utils.MIGRATIONS[1] + ["NOT VALID SQL"]]
+    monkeypatch.setattr(database_utils, "MIGRATIONS", broken)
+    with pytest.raises(sqlite3.OperationalError):
+        database_utils.create_database(path)
+
+    conn = sqlite3.connect(path)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(progress)")]
+    conn.close()
+    assert _version(path) == 1
+    assert "user_id" not in columns
+
+    monkeypatch.undo()
+    database_utils.create_database(path)
+    assert _version(path) == len(database_utils.MIGRATIONS)
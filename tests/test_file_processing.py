@@ -0,0 +1,64 @@
+import io
+import pytest
+from docx import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from utils import file_processing
+from utils.file_processing import DOCX_TYPE, TXT_TYPE, DocumentTooLargeError, parse_file
+from utils.vector_store import PersistentVectorStore
+
+
+def _docx(paragraphs):
+    document = Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_txt_and_docx_text_is_unchanged_by_paging():
+    text = "".join(f"Line {i} with Kubernetes ✓\n" for i in range(2000))
+    assert parse_file(io.BytesIO(text.encode("utf-8")), TXT_TYPE) == text
+    paragraphs = [f"Paragraph {i}" for i in range(1500)]
+    assert parse_file(io.BytesIO(_docx(paragraphs)), DOCX_TYPE) == "\n".join(paragraphs)
+
+
+def test_page_cap_applies_to_txt_and_docx(monkeypatch):
+    monkeypatch.setattr(file_processing, "CHARS_PER_PAGE", 100)
+    with pytest.raises(DocumentTooLargeError):
+        list(file_processing.iter_txt_pages(io.BytesIO(b"x" * 50 + b"\n" * 400), max_pages=2))
+    with pytest.raises(DocumentTooLargeError):
+        list(file_processing.iter_docx_pages(io.BytesIO(_docx(["y" * 120] * 5)), max_pages=3))
+
+
+def test_byte_cap_applies_to_txt():
+    with pytest.raises(DocumentTooLargeError):
+        list(file_processing.iter_txt_pages(io.BytesIO(b"z" * 2048), max_bytes=1024))
+
+
+def test_failed_lazy_load_leaves_index_unchanged(tmp_path):
+    from langchain_core.documents import Document as LangchainDocument
+
+    store = PersistentVectorStore(str(tmp_path / "index"), DeterministicFakeEmbedding(size=8))
+
+    def documents():
+        yield LangchainDocument(page_content="first chunk", metadata={})
+        raise DocumentTooLargeError("too many pages")
+
+    with pytest.raises(DocumentTooLargeError):
+        store.add_documents("doc", documents())
+    assert not store.contains("doc")
+    assert len(store.lexical_index) == 0
+
+    assert store.add_documents("doc", iter([LangchainDocument(page_content="only chunk", metadata={})]))
+    assert store.contains("doc")
+
+
+def test_extraction_cache_keeps_large_texts_on_disk_only(tmp_path):
+    cache = file_processing.ExtractionCache(cache_dir=str(tmp_path), max_memory_chars=100)
+    cache.put("aa-small", "short text")
+    cache.put("bb-large", "x" * 1000)
+
+    assert list(cache._entries) == ["aa-small"]
+    assert cache.get("bb-large") == "x" * 1000
+    assert list(cache._entries) == ["aa-small"]
@@ -0,0 +1,64 @@
+from langchain_core.messages import AIMessageChunk
+from utils import llm_utils
+from utils.llm_utils import stream_prediction
+from utils.response_cache import disable_response_cache, enable_response_cache
+
+
+class FakeStreamingModel:
+    """Streams `chunks` the way a LangChain chat model (message chunks) or completion model (str) does."""
+
+    model_name = "fake-model"
+    temperature = 0.0
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def stream(self, prompt):
+        return iter(self.chunks)
+
+
+def test_stream_prediction_accepts_chat_and_completion_chunks():
+    chat = FakeStreamingModel([AIMessageChunk(content="Hello"), AIMessageChunk(content=""), AIMessageChunk(content=" there")])
+    completion = FakeStreamingModel(["Hello", "", " there"])
+
+    assert list(stream_prediction(chat, "Hi", use_cache=False)) == ["Hello", " there"]
+    assert list(stream_prediction(completion, "Hi", use_cache=False)) == ["Hello", " there"]
+
+
+class FakePredictModel:
+    model_name = "fake-model"
+    temperature = 0.7
+
+    def __init__(self, response):
+        self.response = response
+        self.prompts = []
+
+    def predict(self, prompt):
+        self.prompts.append(prompt)
+        return self.response
+
+
+def _single_tier(llm):
+    def run_cascade(task, api_key, call, validator=None, **params):
+        return call(llm)
+    return run_cascade
+
+
+def test_job_title_variants_share_one_cached_call(monkeypatch):
+    llm = FakePredictModel("- Behavioral Questions:\n  1. Why us?\n- Technical Questions:\n  1. What is SQL?")
+    monkeypatch.setattr(llm_utils, "run_cascade", _single_tier(llm))
+    enable_response_cache("memory")
+    try:
+        for title in ("Data Scientist", "data scientist ", "data  scientist"):
+            llm_utils.generate_mock_questions(title, "key")
+    finally:
+        disable_response_cache()
+    assert len(llm.prompts) == 1
+
+
+def test_parse_score_tolerates_common_formats():
+    assert llm_utils.parse_score("Good answer.\nScore: 7/10") == 7.0
+    assert llm_utils.parse_score("Good answer.\n**Score:** 8/10") == 8.0
+    assert llm_utils.parse_score("Score - 6.5/10") == 6.5
+    assert llm_utils.parse_score("**Score**: 9 / 10") == 9.0
+    assert llm_utils.parse_score("Solid, but no number given.") is None
@@ -0,0 +1,42 @@
+import sqlite3
+from utils import database_utils
+
+
+def test_undated_legacy_rows_stay_out_of_trends(tmp_path):
+    path = str(tmp_path / "progress.db")
+    conn = sqlite3.connect(path)
+    conn.execute(database_utils.MIGRATIONS[0][0])
+    conn.execute("PRAGMA user_version = 1")
+    conn.execute("INSERT INTO progress (question, answer, feedback, score) VALUES ('old', 'a', 'f', 3)")
+    conn.commit()
+    conn.close()
+
+    database_utils.create_database(path)
+    database_utils.save_progress("new", "a", "f", 8, category="Technical", db_path=path)
+
+    trends = database_utils.get_category_trends(days=30, db_path=path)
+    assert [(row["category"], row["attempts"]) for row in trends] == [("Technical", 1)]
+    # Totals still include the undated row.
+    totals = {row["category"]: row["attempts"] for row in database_utils.get_attempt_counts(db_path=path)}
+    assert totals == {"Technical": 1, "Uncategorized": 1}
+    database_utils.close_connection(path)
+
+
+def test_legacy_rows_belong_to_the_default_user(tmp_path):
+    path = str(tmp_path / "progress.db")
+    conn = sqlite3.connect(path)
+    conn.execute(database_utils.MIGRATIONS[0][0])
+    conn.execute("PRAGMA user_version = 1")
+    conn.execute("INSERT INTO progress (question, answer, feedback, score) VALUES ('old', 'a', 'f', 3)")
+    conn.commit()
+    conn.close()
+
+    database_utils.create_database(path)
+    database_utils.save_progress("new", "a", "f", 8, db_path=path)
+
+    user_id = database_utils.DEFAULT_USER_ID
+    rows = database_utils.get_progress(user_id=user_id, db_path=path)
+    assert sorted(row["question"] for row in rows) == ["new", "old"]
+    counts = database_utils.get_attempt_counts(user_id=user_id, db_path=path)
+    assert sum(row["attempts"] for row in counts) == 2
+    database_utils.close_connection(path)
@@ -0,0 +1,18 @@
+import threading
+from utils import database_utils
+from utils.database_utils import ProgressWriter
+
+
+def test_flush_after_close_returns_immediately(tmp_path):
+    path = str(tmp_path / "progress.db")
+    database_utils.create_database(path)
+    writer = ProgressWriter(db_path=path, flush_interval=60)
+    writer.submit({"question": "q", "answer": "a", "feedback": "f", "score": 7})
+    writer.close()
+
+    finished = threading.Event()
+    thread = threading.Thread(target=lambda: (writer.flush(), finished.set()), daemon=True)
+    thread.start()
+    assert finished.wait(5), "flush() blocked after close()"
+    assert [row["question"] for row in database_utils.get_progress(db_path=path)] == ["q"]
+    database_utils.close_connection(path)
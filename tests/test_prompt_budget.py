@@ -0,0 +1,30 @@
+from utils.chunking import count_tokens
+from utils.prompt_budget import build_reduce_prompt, collapse_partials
+
+
+class FakeModel:
+    model_name = "fake-model"
+    temperature = 0.0
+
+    def predict(self, prompt):
+        raise AssertionError("no merge call expected when notes cannot be grouped")
+
+
+def test_partials_that_cannot_be_merged_are_truncated_to_fit():
+    budget = 600
+    partials = [(f"file {i}.txt", f"Note {i}: " + "relevant detail " * 150) for i in range(3)]
+    assert count_tokens(build_reduce_prompt(partials[:2], "", "What matters?")) > budget
+
+    collapsed, usage = collapse_partials(FakeModel(), partials, "", "What matters?", budget, use_cache=False)
+
+    assert usage["truncated"] == 3
+    assert count_tokens(build_reduce_prompt(collapsed, "", "What matters?")) <= budget
+    assert [name for name, _ in collapsed] == [name for name, _ in partials]
+    assert all(answer.startswith(f"Note {i}:") for i, (_, answer) in enumerate(collapsed))
+
+
+def test_partials_that_fit_are_untouched():
+    partials = [("a.txt", "short note"), ("b.txt", "another short note")]
+    collapsed, usage = collapse_partials(FakeModel(), partials, "", "Question?", 1000, use_cache=False)
+    assert collapsed == partials
+    assert usage == {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "truncated": 0}
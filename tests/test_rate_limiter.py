@@ -0,0 +1,129 @@
+import threading
+import time
+import pytest
+import utils.config
+import utils.rate_limiter as rate_limiter
+from utils.rate_limiter import BATCH, INTERACTIVE, RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def restore_limits(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "DEFAULT_LIMITS", dict(rate_limiter.DEFAULT_LIMITS))
+    monkeypatch.setattr(rate_limiter, "MODEL_LIMITS", {})
+    monkeypatch.setattr(rate_limiter, "_limiter", None)
+    monkeypatch.setattr(rate_limiter, "_configured", False)
+
+
+def test_token_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(600)  # 10 per second, 100 burst
+    start = bucket.updated
+    assert bucket.capacity == 100
+    assert bucket.wait_time(100, start) == 0
+
+    bucket.take(100, start)
+    assert bucket.wait_time(20, start) == pytest.approx(2.0)
+    assert bucket.wait_time(20, start + 1) == pytest.approx(1.0)
+    assert bucket.wait_time(20, start + 60) == 0
+    assert bucket.level == bucket.capacity
+
+
+def test_token_bucket_lets_oversized_requests_overdraw():
+    bucket = TokenBucket(600)
+    start = bucket.updated
+    # Larger than the whole bucket: waits for a full bucket, not forever.
+    assert bucket.wait_time(1000, start) == 0
+    bucket.take(1000, start)
+    assert bucket.level == -900
+    assert bucket.wait_time(1, start) == pytest.approx(90.1)
+
+
+def test_concurrency_halves_on_throttling_and_grows_back_additively():
+    limiter = RateLimiter({"requests_per_minute": 0, "tokens_per_minute": 0, "max_concurrency": 8})
+    limiter.acquire("m", 1)
+    limiter.release("m", 1, throttled=True)
+    assert limiter.snapshot()["m"]["concurrency"] == 4
+
+    # A second 429 inside the cooldown belongs to the same burst.
+    limiter.acquire("m", 1)
+    limiter.release("m", 1, throttled=True)
+    assert limiter.snapshot()["m"]["concurrency"] == 4
+
+    for _ in range(4):
+        limiter.acquire("m", 1)
+        limiter.release("m", 1)
+    assert limiter.snapshot()["m"]["concurrency"] == pytest.approx(5, abs=0.1)
+
+    for _ in range(100):
+        limiter.acquire("m", 1)
+        limiter.release("m", 1)
+    assert limiter.snapshot()["m"]["concurrency"] == 8
+
+
+def test_interactive_requests_start_before_queued_batch_work():
+    limiter = RateLimiter({"requests_per_minute": 0, "tokens_per_minute": 0, "max_concurrency": 1})
+    order = []
+
+    def worker(name, priority):
+        limiter.acquire("m", 1, priority)
+        order.append(name)
+        limiter.release("m", 1)
+
+    limiter.acquire("m", 1)  # hold the only slot while the queue builds up
+    threads = []
+    for name, priority in (("batch-1", BATCH), ("batch-2", BATCH), ("interactive", INTERACTIVE)):
+        thread = threading.Thread(target=worker, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        while limiter.snapshot()["m"]["waiting"] < len(threads):
+            time.sleep(0.001)
+    limiter.release("m", 1)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_call_retries_throttled_requests(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE", 0.001)
+
+    class Throttled(Exception):
+        status_code = 429
+
+    attempts = []
+
+    def request():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Throttled()
+        return "ok"
+
+    limiter = RateLimiter({"requests_per_minute": 0, "tokens_per_minute": 0})
+    assert limiter.call("m", request, tokens=10) == "ok"
+    assert len(attempts) == 3
+    assert limiter.snapshot()["m"]["throttled"] == 2
+
+
+def test_limits_are_read_from_config(restore_limits, tmp_path, monkeypatch):
+    (tmp_path / "config.yaml").write_text(
+        "rate_limits:\n"
+        "  default:\n"
+        "    max_concurrency: 3\n"
+        "  models:\n"
+        "    gpt-4:\n"
+        "      tokens_per_minute: 0\n"
+    )
+    monkeypatch.setattr(utils.config, "CONFIG_DIR", str(tmp_path))
+
+    limiter = rate_limiter.get_rate_limiter()
+    assert limiter.limits["max_concurrency"] == 3
+    assert limiter.model_limits["gpt-4"] == dict(limiter.limits, tokens_per_minute=0)
+
+
+def test_explicit_limits_win_over_config(restore_limits, tmp_path, monkeypatch):
+    (tmp_path / "config.yaml").write_text("rate_limits:\n  default:\n    max_concurrency: 3\n")
+    monkeypatch.setattr(utils.config, "CONFIG_DIR", str(tmp_path))
+
+    rate_limiter.configure_rate_limits(tokens_per_minute=0, max_concurrency=64)
+    limiter = rate_limiter.get_rate_limiter()
+    assert limiter.limits["max_concurrency"] == 64
+    assert limiter.limits["tokens_per_minute"] == 0
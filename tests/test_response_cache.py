@@ -0,0 +1,15 @@
+from utils.response_cache import MemoryResponseCache, ResponseCache
+
+
+def test_whitespace_variants_share_one_entry():
+    backend = MemoryResponseCache(max_entries=10)
+    cache = ResponseCache(backend)
+    cache.set("gpt-4", "Evaluate:\n  the answer", 0.7, "7/10")
+    assert cache.get("gpt-4", "Evaluate: the answer", 0.7) == "7/10"
+    assert len(backend._entries) == 1
+
+
+def test_case_differences_do_not_share_entries():
+    cache = ResponseCache(MemoryResponseCache(max_entries=10))
+    cache.set("gpt-4", "Resume: Worked on AWS", 0.7, "first")
+    assert cache.get("gpt-4", "resume: worked on aws", 0.7) is None
@@ -0,0 +1,34 @@
+from utils.resume_matching import match_resume, with_omitted_sections
+
+RESUME = """Jane Doe
+jane@example.com | +1 555 123 4567
+
+EXPERIENCE
+Built Python data pipelines on AWS with Spark and Airflow.
+
+HOBBIES
+Watercolour painting, sailing and birdwatching.
+
+SKILLS
+Python, SQL, Spark, Airflow, AWS
+"""
+
+JOB = "Data engineer: Python, Spark, Airflow pipelines on AWS, strong SQL."
+
+
+def test_omitted_sections_are_spliced_back_verbatim():
+    match = match_resume(RESUME, JOB)
+    assert match["omitted_titles"] == ["HOBBIES"]
+    assert "sailing" not in match["kept_text"]
+
+    result = with_omitted_sections("Revised resume", match)
+    assert result == "Revised resume\n\nHOBBIES:\nWatercolour painting, sailing and birdwatching."
+    assert with_omitted_sections("Revised resume", None) == "Revised resume"
+
+
+def test_contact_block_is_kept_without_a_header_section():
+    # No text before the first heading, so the first section is a regular one.
+    resume = "HOBBIES\nSailing and painting\n\nCONTACT\njane@example.com\n\nSKILLS\nPython, Spark, SQL"
+    match = match_resume(resume, JOB)
+    kept = {section["title"]: section["kept"] for section in match["sections"]}
+    assert kept == {"HOBBIES": False, "CONTACT": True, "SKILLS": True}
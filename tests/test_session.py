@@ -0,0 +1,88 @@
+import os
+from streamlit.testing.v1 import AppTest
+from utils import session
+
+
+def _identity_script():
+    import streamlit as st
+    from utils.session import get_user_id
+
+    st.session_state.user_id = get_user_id()
+
+
+def _scratch_script():
+    import os
+    import streamlit as st
+    from utils import session
+
+    documents = session.session_documents("docs", "upload-1", lambda: [("big.txt", "x" * 100_000)])
+    session.stored_documents("docs")
+    st.session_state.scratch_dir = os.path.dirname(documents[0].path)
+
+
+def _replace_documents_script():
+    import streamlit as st
+    from utils import session
+
+    def load():
+        if st.session_state.get("fail"):
+            raise ValueError("too large")
+        return [("resume.txt", "first resume")]
+
+    try:
+        session.session_documents("docs", st.session_state.get("source", "upload-1"), load)
+    except ValueError as e:
+        st.session_state.error = str(e)
+    st.session_state.texts = [document.text() for document in session.stored_documents("docs")]
+
+
+def _vector_store_script():
+    import streamlit as st
+    from utils import session
+
+    first = session.shared_vector_store("doc", "key-one")
+    second = session.shared_vector_store("doc", "key-two")
+    st.session_state.distinct = first is not second and first.path != second.path
+    st.session_state.reused = session.shared_vector_store("doc", "key-one") is first
+    st.session_state.keys = [store.embeddings.embeddings.openai_api_key for store in (first, second)]
+
+
+def test_user_id_ignores_query_parameters():
+    app = AppTest.from_function(_identity_script)
+    app.query_params["user"] = "someone-else"
+    app.run()
+    assert app.session_state.user_id == "local"
+
+
+def test_reruns_keep_the_scratch_dir_fresh(tmp_path, monkeypatch):
+    monkeypatch.setattr(session, "SCRATCH_ROOT", str(tmp_path))
+    app = AppTest.from_function(_scratch_script)
+    app.run()
+    scratch_dir = app.session_state.scratch_dir
+    os.utime(scratch_dir, (0, 0))
+    app.run()
+    assert os.stat(scratch_dir).st_mtime > 0
+    assert os.listdir(scratch_dir)
+
+
+def test_failed_load_keeps_the_previous_documents(tmp_path, monkeypatch):
+    monkeypatch.setattr(session, "SCRATCH_ROOT", str(tmp_path))
+    app = AppTest.from_function(_replace_documents_script)
+    app.run()
+    assert app.session_state.texts == ["first resume"]
+
+    app.session_state.source = "upload-2"
+    app.session_state.fail = True
+    app.run()
+    assert app.session_state.error == "too large"
+    assert app.session_state.texts == ["first resume"]
+
+
+def test_vector_stores_are_not_shared_across_api_keys(tmp_path, monkeypatch):
+    monkeypatch.setattr(session, "VECTORSTORE_ROOT", str(tmp_path))
+    app = AppTest.from_function(_vector_store_script)
+    app.run()
+    assert not app.exception
+    assert app.session_state.distinct
+    assert app.session_state.reused
+    assert app.session_state.keys == ["key-one", "key-two"]
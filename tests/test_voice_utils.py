@@ -0,0 +1,92 @@
+import threading
+import time
+import speech_recognition as sr
+from utils.voice_utils import StubRecognizer, VoiceCapture
+
+
+class FakeSource:
+    """Yields canned audio segments, then keeps 'listening' until stopped."""
+
+    def __init__(self, segments, endless=False):
+        self.segments_to_yield = list(segments)
+        self.endless = endless
+
+    def segments(self, stop_event):
+        for audio in self.segments_to_yield:
+            if stop_event.is_set():
+                return
+            yield audio
+        while self.endless and not stop_event.is_set():
+            stop_event.wait(0.01)
+
+
+class SlowRecognizer:
+    """Transcribes `audio` after `delays[audio]` seconds, so later segments can finish first."""
+
+    def __init__(self, delays):
+        self.delays = delays
+
+    def transcribe(self, audio):
+        delay = self.delays.get(audio, 0)
+        if isinstance(delay, Exception):
+            raise delay
+        time.sleep(delay)
+        return audio
+
+
+def _wait_until_finished(capture, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not capture.is_finished:
+        assert time.monotonic() < deadline, "capture did not finish"
+        time.sleep(0.01)
+
+
+def test_transcripts_are_released_in_recording_order():
+    recognizer = SlowRecognizer({"one": 0.2, "two": 0.0, "three": 0.0})
+    capture = VoiceCapture(FakeSource(["one", "two", "three"]), recognizer, max_workers=3).start()
+
+    time.sleep(0.1)
+    # "two" and "three" are done but wait behind the slower first segment.
+    assert capture.take_text() == ""
+    _wait_until_finished(capture)
+    assert capture.take_text() == "one two three"
+    assert capture.take_text() == ""
+
+
+def test_stop_returns_without_waiting_for_transcription():
+    gate = threading.Event()
+
+    class BlockedRecognizer:
+        def transcribe(self, audio):
+            gate.wait(5)
+            return audio
+
+    capture = VoiceCapture(FakeSource(["hello"], endless=True), BlockedRecognizer()).start()
+    while capture.segments_recorded < 1:
+        time.sleep(0.01)
+
+    start = time.monotonic()
+    capture.stop()
+    assert time.monotonic() - start < 0.1
+    assert capture.stopping
+    assert not capture.is_finished
+
+    gate.set()
+    _wait_until_finished(capture)
+    assert capture.take_text() == "hello"
+
+
+def test_recognition_errors_are_collected():
+    recognizer = SlowRecognizer({"mumble": sr.UnknownValueError(), "offline": sr.RequestError("no network")})
+    capture = VoiceCapture(FakeSource(["mumble", "offline", "fine"]), recognizer).start()
+    capture.wait(5)
+
+    assert capture.is_finished
+    assert capture.take_text() == "fine"
+    assert capture.errors == ["Error with the recognition service: no network"]
+
+
+def test_stub_recognizer_numbers_extra_segments():
+    capture = VoiceCapture(FakeSource(["a", "b", "c"]), StubRecognizer(["first"]), max_workers=1).start()
+    capture.wait(5)
+    assert capture.take_text() == "first [segment 2] [segment 3]"
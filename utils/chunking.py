@@ -0,0 +1,112 @@
+import logging
+import re
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "cl100k_base"
+CHUNK_TOKENS = 400
+CHUNK_OVERLAP = 60
+
+# Per-request limits for embedding calls: fill each request up to these bounds
+# instead of sending one request per page or one huge request per upload.
+EMBED_BATCH_TOKENS = 8000
+EMBED_BATCH_SIZE = 128
+
+# Identifies the chunking scheme so indexes built with other settings are not reused.
+CHUNK_SCHEME = f"{ENCODING_NAME}:{CHUNK_TOKENS}:{CHUNK_OVERLAP}"
+
+_encoding = None
+
+
+class _ApproximateEncoding:
+    """
+    Stand-in for tiktoken when its BPE files cannot be downloaded (offline
+    hosts, benchmarks). Tokens are runs of up to four characters, which is
+    close to the ~4 characters per token of cl100k_base on English text.
+    """
+
+    _pattern = re.compile(r"\s*[^\s]{1,4}|\s+")
+
+    def encode(self, text, disallowed_special=()):
+        return self._pattern.findall(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def get_encoding():
+    """Return the shared tiktoken encoding, loading it on first use."""
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding(ENCODING_NAME)
+        except Exception:
+            logger.warning("Could not load tiktoken encoding %s; using approximate token counts", ENCODING_NAME)
+            _encoding = _ApproximateEncoding()
+    return _encoding
+
+
+def count_tokens(text):
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def chunk_text(text, metadata=None, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """Split `text` into overlapping Documents of at most `chunk_tokens` tokens."""
+    from langchain_core.documents import Document
+
+    if overlap >= chunk_tokens:
+        raise ValueError("overlap must be smaller than chunk_tokens")
+
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+    metadata = metadata or {}
+    chunks = []
+    step = chunk_tokens - overlap
+    for start in range(0, len(tokens), step):
+        window = tokens[start:start + chunk_tokens]
+        content = encoding.decode(window).strip()
+        if content:
+            chunks.append(Document(
+                page_content=content,
+                metadata={**metadata, "chunk": len(chunks), "start_token": start},
+            ))
+        if start + chunk_tokens >= len(tokens):
+            break
+    return chunks
+
+
+def iter_chunks(documents, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """Chunk Documents lazily, one input document at a time, keeping metadata (source, page)."""
+    for document in documents:
+        yield from chunk_text(document.page_content, document.metadata, chunk_tokens, overlap)
+
+
+def chunk_documents(documents, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """Chunk every Document, keeping its metadata (source, page) on each chunk."""
+    return list(iter_chunks(documents, chunk_tokens, overlap))
+
+
+def batch_by_tokens(texts, max_batch_tokens=EMBED_BATCH_TOKENS, max_batch_size=EMBED_BATCH_SIZE, text_of=None):
+    """
+    Group `texts` into consecutive batches bounded by token count and size.
+    With `text_of`, items are arbitrary objects (e.g. Documents) measured by text_of(item).
+    """
+    batch, batch_tokens = [], 0
+    for text in texts:
+        tokens = count_tokens(text_of(text) if text_of else text)
+        if batch and (batch_tokens + tokens > max_batch_tokens or len(batch) >= max_batch_size):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def embed_in_batches(embeddings, texts, max_batch_tokens=EMBED_BATCH_TOKENS, max_batch_size=EMBED_BATCH_SIZE):
+    """Embed `texts` with one `embed_documents` call per token-bounded batch."""
+    vectors = []
+    for batch in batch_by_tokens(texts, max_batch_tokens, max_batch_size):
+        vectors.extend(embeddings.embed_documents(batch))
+    return vectors
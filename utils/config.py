@@ -0,0 +1,48 @@
+import os
+import threading
+import yaml
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(PROJECT_ROOT, "config")
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_settings(file_name="config.yaml"):
+    """
+    Parsed contents of config/<file_name>. The parsed dict is cached and only
+    re-read when the file's mtime or size changes, so calling this on every
+    Streamlit rerun costs a stat(). Treat the result as read-only.
+    """
+    config_path = os.path.join(CONFIG_DIR, file_name)
+    try:
+        stat = os.stat(config_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Configuration file not found at {config_path}")
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _cache.get(config_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    with open(config_path, "r") as file:
+        settings = yaml.safe_load(file) or {}
+    with _lock:
+        _cache[config_path] = (signature, settings)
+    return settings
+
+
+def load_config(file_name="config.yaml"):
+    """OpenAI API key from the config file, or None if it is not set."""
+    return load_settings(file_name).get("openai_api_key")
+
+
+def get_section(name, file_name="config.yaml"):
+    """Top-level mapping `name` from the config file; empty if the file or section is missing."""
+    try:
+        section = load_settings(file_name).get(name)
+    except FileNotFoundError:
+        return {}
+    return section or {}
@@ -1,10 +1,25 @@
+import atexit
+import logging
+import queue
 import sqlite3
+import threading
+import time
+from utils.metrics import increment, span
 
-def create_database():
-    """Create SQLite database to store user progress."""
-    conn = sqlite3.connect("user_progress.db")
-    cursor = conn.cursor()
-    cursor.execute("""
+DB_PATH = "user_progress.db"
+
+# Owner of rows saved without a user, including everything recorded before per-user tracking.
+DEFAULT_USER_ID = "local"
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version).
+MIGRATIONS = [
+    # 1: original table.
+    [
+        """
         CREATE TABLE IF NOT EXISTS progress (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             question TEXT,
@@ -12,26 +27,391 @@ def create_database():
             feedback TEXT,
             score INTEGER
         )
-    """)
-    conn.commit()
-    conn.close()
+        """,
+    ],
+    # 2: who answered, when, and what kind of question, plus indexes for filtering.
+    [
+        "ALTER TABLE progress ADD COLUMN user_id TEXT",
+        "ALTER TABLE progress ADD COLUMN session_id TEXT",
+        "ALTER TABLE progress ADD COLUMN created_at REAL",
+        "ALTER TABLE progress ADD COLUMN category TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_progress_user_created ON progress (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_progress_session_created ON progress (session_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_progress_category_created ON progress (category, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_progress_created ON progress (created_at)",
+    ],
+    # 3: per-user rollup tables kept current by triggers so the dashboard never scans `progress`.
+    # Rows without a timestamp are counted under day 'unknown', which date-window queries exclude.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS progress_daily_stats (
+            user_id TEXT NOT NULL,
+            category TEXT NOT NULL,
+            day TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            scored_attempts INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, category, day)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS progress_question_stats (
+            user_id TEXT NOT NULL,
+            question TEXT NOT NULL,
+            category TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            scored_attempts INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            average_score REAL,
+            last_attempt_at REAL,
+            PRIMARY KEY (user_id, question, category)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_question_stats_user_average
+        ON progress_question_stats (user_id, average_score)
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS progress_rollup_after_insert AFTER INSERT ON progress
+        BEGIN
+            INSERT INTO progress_daily_stats (user_id, category, day, attempts, scored_attempts, score_sum)
+            VALUES (
+                COALESCE(NEW.user_id, 'local'),
+                COALESCE(NEW.category, 'Uncategorized'),
+                COALESCE(date(NEW.created_at, 'unixepoch'), 'unknown'),
+                1, NEW.score IS NOT NULL, COALESCE(NEW.score, 0)
+            )
+            ON CONFLICT (user_id, category, day) DO UPDATE SET
+                attempts = attempts + 1,
+                scored_attempts = scored_attempts + excluded.scored_attempts,
+                score_sum = score_sum + excluded.score_sum;
+
+            INSERT INTO progress_question_stats (
+                user_id, question, category, attempts, scored_attempts, score_sum, average_score, last_attempt_at
+            )
+            VALUES (
+                COALESCE(NEW.user_id, 'local'), COALESCE(NEW.question, ''), COALESCE(NEW.category, 'Uncategorized'),
+                1, NEW.score IS NOT NULL, COALESCE(NEW.score, 0), NEW.score, NEW.created_at
+            )
+            ON CONFLICT (user_id, question, category) DO UPDATE SET
+                attempts = attempts + 1,
+                scored_attempts = scored_attempts + excluded.scored_attempts,
+                score_sum = score_sum + excluded.score_sum,
+                average_score = CASE WHEN scored_attempts + excluded.scored_attempts > 0
+                    THEN (score_sum + excluded.score_sum) / (scored_attempts + excluded.scored_attempts) END,
+                last_attempt_at = MAX(COALESCE(last_attempt_at, 0), COALESCE(excluded.last_attempt_at, 0));
+        END
+        """,
+        # Rows from before per-user tracking belong to the default (single) user.
+        "UPDATE progress SET user_id = 'local' WHERE user_id IS NULL OR user_id = ''",
+        # Backfill rollups from rows written before the triggers existed.
+        """
+        INSERT INTO progress_daily_stats (user_id, category, day, attempts, scored_attempts, score_sum)
+        SELECT user_id, COALESCE(category, 'Uncategorized'),
+               COALESCE(date(created_at, 'unixepoch'), 'unknown'),
+               COUNT(*), COUNT(score), COALESCE(SUM(score), 0)
+        FROM progress GROUP BY 1, 2, 3
+        """,
+        """
+        INSERT INTO progress_question_stats (
+            user_id, question, category, attempts, scored_attempts, score_sum, average_score, last_attempt_at
+        )
+        SELECT user_id, COALESCE(question, ''), COALESCE(category, 'Uncategorized'),
+               COUNT(*), COUNT(score), COALESCE(SUM(score), 0), AVG(score), MAX(created_at)
+        FROM progress GROUP BY 1, 2, 3
+        """,
+    ],
+]
+
+PROGRESS_COLUMNS = ("id", "user_id", "session_id", "category", "question", "answer", "feedback", "score", "created_at")
+
+
+def get_connection(db_path=DB_PATH):
+    """Return this thread's connection to `db_path`, opening it on first use."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed while another session is writing.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[db_path] = conn
+    return conn
+
+
+def close_connection(db_path=DB_PATH):
+    """Close this thread's connection to `db_path`, if any."""
+    connections = getattr(_local, "connections", {})
+    conn = connections.pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
 
-def save_progress(question, answer, feedback, score):
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def _apply_next_migration(conn):
+    """Apply one pending migration atomically; returns False once the schema is current."""
+    # BEGIN IMMEDIATE takes the write lock first, so a process that loses the race
+    # re-reads the version another process just committed instead of re-running its DDL.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            conn.execute("COMMIT")
+            return False
+        for statement in MIGRATIONS[version]:
+            conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {version + 1}")
+        conn.execute("COMMIT")
+        return True
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def create_database(db_path=DB_PATH):
+    """
+    Create the SQLite database to store user progress and apply pending
+    migrations, each in its own transaction. Runs once per process and path.
+    """
+    with _migrate_lock:
+        if db_path in _migrated:
+            return
+        # Autocommit mode: the sqlite3 module would otherwise commit implicitly around DDL.
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            while _apply_next_migration(conn):
+                pass
+        finally:
+            conn.close()
+        _migrated.add(db_path)
+
+
+def _progress_row(question, answer, feedback, score, user_id=None, session_id=None, category=None, created_at=None):
+    return (
+        user_id or DEFAULT_USER_ID, session_id, category, question, answer, feedback, score, created_at or time.time()
+    )
+
+
+_INSERT_PROGRESS = """
+    INSERT INTO progress (user_id, session_id, category, question, answer, feedback, score, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def save_progress(question, answer, feedback, score, user_id=None, session_id=None, category=None, db_path=DB_PATH):
     """Save progress to the database."""
-    conn = sqlite3.connect("user_progress.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-    
-        INSERT INTO progress (question, answer, feedback, score) VALUES (?, ?, ?, ?)
-    """, (question, answer, feedback, score))
-    conn.commit()
-    conn.close()
-
-def get_progress():
-    """Retrieve all progress records."""
-    conn = sqlite3.connect("user_progress.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM progress")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    conn = get_connection(db_path)
+    with span("db_write", op="single"), conn:
+        conn.execute(_INSERT_PROGRESS, _progress_row(question, answer, feedback, score, user_id, session_id, category))
+    increment("progress_rows_written")
+
+
+def save_progress_batch(records, db_path=DB_PATH):
+    """
+    Save several records in one transaction. Each record is a dict with
+    question, answer, feedback, score and optionally user_id, session_id,
+    category and created_at.
+    """
+    conn = get_connection(db_path)
+    with span("db_write", op="batch"), conn:
+        conn.executemany(_INSERT_PROGRESS, [_progress_row(**record) for record in records])
+    increment("progress_rows_written", len(records))
+
+
+def get_progress(user_id=None, session_id=None, category=None, since=None, limit=50, offset=0, db_path=DB_PATH):
+    """
+    Retrieve one page of progress records, newest first, optionally filtered
+    by user, session, category and minimum `created_at` timestamp.
+    """
+    clauses, params = [], []
+    for column, value in (("user_id", user_id), ("session_id", session_id), ("category", category)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = f"""
+        SELECT {', '.join(PROGRESS_COLUMNS)} FROM progress
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ? OFFSET ?
+    """
+    return get_connection(db_path).execute(query, (*params, limit, offset)).fetchall()
+
+
+def get_category_trends(days=30, user_id=None, db_path=DB_PATH):
+    """
+    Average score and attempts per category per day over the last `days` days,
+    for one user or, when `user_id` is None, for everyone.
+    """
+    return get_connection(db_path).execute("""
+        SELECT category, day, SUM(attempts) AS attempts, SUM(scored_attempts) AS scored_attempts,
+               CASE WHEN SUM(scored_attempts) > 0 THEN SUM(score_sum) / SUM(scored_attempts) END AS average_score
+        FROM progress_daily_stats
+        WHERE (:user_id IS NULL OR user_id = :user_id) AND day != 'unknown' AND day >= date('now', :since)
+        GROUP BY category, day
+        ORDER BY day, category
+    """, {"user_id": user_id, "since": f"-{int(days)} days"}).fetchall()
+
+
+def get_weakest_questions(limit=10, min_scored_attempts=1, user_id=None, db_path=DB_PATH):
+    """Questions with the lowest average score, for one user or for everyone."""
+    conn = get_connection(db_path)
+    if user_id is not None:
+        # Served straight from the (user_id, average_score) index.
+        return conn.execute("""
+            SELECT question, category, attempts, scored_attempts, average_score, last_attempt_at
+            FROM progress_question_stats
+            WHERE user_id = ? AND average_score IS NOT NULL AND scored_attempts >= ?
+            ORDER BY average_score ASC
+            LIMIT ?
+        """, (user_id, min_scored_attempts, limit)).fetchall()
+    return conn.execute("""
+        SELECT question, category, SUM(attempts) AS attempts, SUM(scored_attempts) AS scored_attempts,
+               SUM(score_sum) / SUM(scored_attempts) AS average_score, MAX(last_attempt_at) AS last_attempt_at
+        FROM progress_question_stats
+        GROUP BY question, category
+        HAVING SUM(scored_attempts) >= MAX(?, 1)
+        ORDER BY average_score ASC
+        LIMIT ?
+    """, (min_scored_attempts, limit)).fetchall()
+
+
+def get_attempt_counts(user_id=None, db_path=DB_PATH):
+    """Total and scored attempts, and overall average score, per category."""
+    return get_connection(db_path).execute("""
+        SELECT category, SUM(attempts) AS attempts, SUM(scored_attempts) AS scored_attempts,
+               CASE WHEN SUM(scored_attempts) > 0 THEN SUM(score_sum) / SUM(scored_attempts) END AS average_score
+        FROM progress_daily_stats
+        WHERE ? IS NULL OR user_id = ?
+        GROUP BY category
+        ORDER BY category
+    """, (user_id, user_id)).fetchall()
+
+
+_STOP = object()
+
+
+class ProgressWriter:
+    """
+    Write-behind queue for progress records. Callers enqueue records and return
+    immediately; a background thread commits them in batched transactions once
+    `batch_size` records are waiting or `flush_interval` seconds have passed.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_queue=1000, batch_size=50, flush_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        # Orders puts against close(), so nothing is queued behind _STOP where no one reads it.
+        self._put_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Queue one record (a dict as accepted by save_progress_batch)."""
+        self.submit_many([record])
+
+    def submit_many(self, records):
+        """Queue records that must be committed together in one transaction."""
+        with self._put_lock:
+            if self._closed:
+                raise RuntimeError("ProgressWriter is closed")
+            # Blocks only when the queue is full, which bounds memory under a stalled disk.
+            self._queue.put(list(records))
+
+    def flush(self, timeout=None):
+        """
+        Block until everything queued before this call has been committed.
+        After close() this only waits for the writer thread to finish.
+        """
+        done = None
+        with self._put_lock:
+            if not self._closed:
+                done = threading.Event()
+                self._queue.put(done)
+        if done is None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Commit whatever is still queued and stop the writer thread."""
+        with self._put_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _write(self, pending):
+        if not pending:
+            return
+        try:
+            save_progress_batch(pending, db_path=self.db_path)
+        except Exception:
+            logger.exception("Failed to write %d progress records", len(pending))
+        finally:
+            pending.clear()
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(pending)
+                deadline = None
+                continue
+
+            if item is _STOP:
+                self._write(pending)
+                close_connection(self.db_path)
+                return
+            if isinstance(item, threading.Event):
+                self._write(pending)
+                deadline = None
+                item.set()
+                continue
+
+            pending.extend(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(pending) >= self.batch_size:
+                self._write(pending)
+                deadline = None
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_progress_writer(db_path=DB_PATH):
+    """Return the process-wide ProgressWriter, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ProgressWriter(db_path)
+            atexit.register(_writer.close)
+        return _writer
+
+
+def enqueue_progress(question, answer, feedback, score, **fields):
+    """Non-blocking save_progress: the record is written by the background writer."""
+    get_progress_writer().submit(
+        {"question": question, "answer": answer, "feedback": feedback, "score": score, **fields}
+    )
@@ -0,0 +1,83 @@
+import mmap
+import os
+import tempfile
+
+# Documents larger than this (UTF-8 bytes) are written to a temp file instead of kept in memory.
+SPILL_THRESHOLD = 64 * 1024
+
+# Preview page size in bytes; what one rerun sends to the browser.
+PAGE_BYTES = 8 * 1024
+
+
+def _char_start(data, offset):
+    """Move `offset` forward past UTF-8 continuation bytes so slices never split a character."""
+    while offset < len(data) and (data[offset] & 0xC0) == 0x80:
+        offset += 1
+    return offset
+
+
+class DocumentHandle:
+    """
+    Extracted text stored once per session: in memory when small, otherwise
+    in a UTF-8 file whose pages are read through mmap. Previews read one page;
+    text() materializes the whole document only when a prompt needs it.
+    """
+
+    def __init__(self, text, name="document", directory=None, threshold=SPILL_THRESHOLD):
+        self.path = None
+        data = text.encode("utf-8")
+        self.name = name
+        self.size = len(data)
+        self._data = None
+        if self.size > threshold:
+            fd, self.path = tempfile.mkstemp(prefix="document_", suffix=".txt", dir=directory)
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+        else:
+            self._data = data
+
+    @property
+    def spilled(self):
+        return self.path is not None
+
+    def __bool__(self):
+        return self.size > 0
+
+    def text(self):
+        """The full text."""
+        if self.path is None:
+            return self._data.decode("utf-8")
+        with open(self.path, "rb") as file:
+            return file.read().decode("utf-8")
+
+    def page_count(self, page_bytes=PAGE_BYTES):
+        return max(1, -(-self.size // page_bytes))
+
+    def page(self, number, page_bytes=PAGE_BYTES):
+        """Text of page `number` (0-based) of roughly `page_bytes` bytes."""
+        if self.path is None:
+            return self._slice(self._data, number, page_bytes)
+        if not self.size:
+            return ""
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return self._slice(data, number, page_bytes)
+
+    def _slice(self, data, number, page_bytes):
+        start = _char_start(data, number * page_bytes)
+        end = _char_start(data, (number + 1) * page_bytes)
+        return data[start:end].decode("utf-8")
+
+    def close(self):
+        """Delete the spilled file, if any; the handle is unusable afterwards."""
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+            self._data = b""
+            self.size = 0
+
+    def __del__(self):
+        # Sessions that end drop their handles; don't leave the temp file behind.
+        self.close()
@@ -0,0 +1,150 @@
+import hashlib
+import sqlite3
+import threading
+from array import array
+from langchain_core.embeddings import Embeddings
+from utils.chunking import count_tokens, embed_in_batches
+from utils.metrics import increment, metrics_enabled, record_tokens, span
+
+DEFAULT_CACHE_PATH = "embedding_cache.db"
+
+# SQLite limits the number of bound parameters per statement.
+_LOOKUP_CHUNK = 500
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed store of embedding vectors keyed by (model, text hash)."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, model, hashes):
+        """Return {hash: vector} for the hashes present in the cache."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    (model, *chunk),
+                )
+                for row_hash, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[row_hash] = vector.tolist()
+        return found
+
+    def put_many(self, model, items):
+        """Store (hash, vector) pairs as float32 blobs in one transaction."""
+        rows = [(model, item_hash, array("f", vector).tobytes()) for item_hash, vector in items]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)", rows
+                )
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves known texts from an EmbeddingCache and
+    only sends cache misses to the wrapped model, in token-bounded batches.
+    """
+
+    def __init__(self, embeddings, cache, model=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, "model", None) or type(embeddings).__name__
+
+    def embed_documents(self, texts):
+        hashes = [text_hash(text) for text in texts]
+        found = self.cache.get_many(self.model, hashes)
+
+        missing = {}
+        for text, item_hash in zip(texts, hashes):
+            if item_hash not in found and item_hash not in missing:
+                missing[item_hash] = text
+        if missing:
+            # Indexing runs at the caller's priority: in the app a user is waiting on it,
+            # and batch jobs already run everything at BATCH.
+            with span("embed", model=self.model):
+                vectors = embed_in_batches(self.embeddings, list(missing.values()))
+            if metrics_enabled():
+                record_tokens(self.model, prompt_tokens=sum(count_tokens(text) for text in missing.values()))
+            # Round to float32 now so fresh and cached vectors are identical.
+            new_items = [(item_hash, array("f", vector).tolist()) for item_hash, vector in zip(missing, vectors)]
+            self.cache.put_many(self.model, new_items)
+            found.update(new_items)
+
+        self.cache.record(hits=len(texts) - len(missing), misses=len(missing))
+        increment("embedding_cache", len(texts) - len(missing), result="hit")
+        increment("embedding_cache", len(missing), result="miss")
+        return [found[item_hash] for item_hash in hashes]
+
+    def embed_query(self, text):
+        item_hash = text_hash(text)
+        found = self.cache.get_many(self.model, [item_hash])
+        if item_hash in found:
+            self.cache.record(hits=1, misses=0)
+            increment("embedding_cache", result="hit")
+            return found[item_hash]
+        with span("embed", model=self.model):
+            vector = array("f", self.embeddings.embed_query(text)).tolist()
+        if metrics_enabled():
+            record_tokens(self.model, prompt_tokens=count_tokens(text))
+        self.cache.put_many(self.model, [(item_hash, vector)])
+        self.cache.record(hits=0, misses=1)
+        increment("embedding_cache", result="miss")
+        return vector
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path=DEFAULT_CACHE_PATH):
+    """Return the process-wide EmbeddingCache for `path`."""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = EmbeddingCache(path)
+            _caches[path] = cache
+        return cache
+
+
+def cached_embeddings(embeddings, path=DEFAULT_CACHE_PATH):
+    """Wrap `embeddings` with the shared on-disk cache at `path`."""
+    return CachedEmbeddings(embeddings, get_embedding_cache(path))
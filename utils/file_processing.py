@@ -1,16 +1,314 @@
+import hashlib
+import io
+import multiprocessing
 import os
-from docx import Document
-from PyPDF2 import PdfReader
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.document_handle import SPILL_THRESHOLD
+from utils.metrics import increment, record_span, span
+
+# Bump whenever the parsing logic below changes so cached text is not reused.
+PARSER_VERSION = "1"
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TXT_TYPE = "text/plain"
+
+# Short names used as metric labels.
+FILE_KINDS = {PDF_TYPE: "pdf", DOCX_TYPE: "docx", TXT_TYPE: "txt"}
+
+# Limits for every upload; larger documents are rejected instead of parsed in full.
+MAX_PDF_PAGES = 300
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# DOCX and TXT have no pages; their text is cut into pages of about this many
+# characters (at paragraph/line boundaries) so the page cap applies to them too.
+CHARS_PER_PAGE = 3000
+
+
+class DocumentTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured page or byte cap."""
+
+
+class ExtractionCache:
+    """
+    Bounded in-memory LRU of extracted text with an optional on-disk tier.
+    Texts longer than `max_memory_chars` are only kept on disk: sessions hold
+    them as spilled DocumentHandles, and a second in-memory copy here would
+    undo that.
+    """
+
+    def __init__(self, max_entries=32, cache_dir=None, max_memory_chars=SPILL_THRESHOLD):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_memory_chars = max_memory_chars
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key):
+        """Return cached text for `key`, or None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as file:
+                text = file.read()
+        except OSError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        """Store `text` in memory and, if configured, on disk."""
+        self._remember(key, text)
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(text)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The disk tier is best effort; the in-memory entry is still valid.
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, text):
+        if len(text) > self.max_memory_chars:
+            return
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache = ExtractionCache(cache_dir=os.environ.get("EXTRACTION_CACHE_DIR") or None)
+
+
+def configure_extraction_cache(max_entries=32, cache_dir=None, max_memory_chars=SPILL_THRESHOLD):
+    """Replace the shared extraction cache, e.g. to enable the on-disk tier."""
+    global _cache
+    _cache = ExtractionCache(max_entries=max_entries, cache_dir=cache_dir, max_memory_chars=max_memory_chars)
+    return _cache
+
+
+def get_extraction_cache():
+    return _cache
+
+
+def content_key(data, file_type, *salt):
+    """
+    Cache key for an upload: hash of its bytes, its MIME type and the parser version.
+    Extra `salt` strings (e.g. a chunking scheme) are mixed into the key.
+    """
+    digest = hashlib.sha256()
+    for part in (PARSER_VERSION, file_type, *salt):
+        digest.update(f"{part}\0".encode("utf-8"))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _upload_buffer(uploaded_file):
+    """Return the upload's bytes without copying when the object supports it."""
+    if hasattr(uploaded_file, "getbuffer"):
+        return uploaded_file.getbuffer()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def _stream_size(stream):
+    if hasattr(stream, "getbuffer"):
+        with stream.getbuffer() as view:
+            return view.nbytes
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
+
+def _check_size(stream, max_bytes, kind):
+    size = _stream_size(stream)
+    if size > max_bytes:
+        raise DocumentTooLargeError(f"{kind} is {size} bytes; the limit is {max_bytes} bytes")
+
+
+def iter_pdf_pages(stream, max_pages=MAX_PDF_PAGES, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Yield (page_number, text) one page at a time, reading straight from the
+    in-memory upload (no temp file, no copy). Page numbers start at 1.
+    """
+    _check_size(stream, max_bytes, "PDF")
+
+    from PyPDF2 import PdfReader
+
+    stream.seek(0)
+    reader = PdfReader(stream)
+    page_count = len(reader.pages)
+    if page_count > max_pages:
+        raise DocumentTooLargeError(f"PDF has {page_count} pages; the limit is {max_pages} pages")
+
+    for index in range(page_count):
+        yield index + 1, reader.pages[index].extract_text() or ""
+
+
+def _paginate(pieces, separator, kind, max_pages):
+    """Group text pieces into pages of about CHARS_PER_PAGE characters, enforcing `max_pages`."""
+    page, length, page_number = [], 0, 0
+    for piece in pieces:
+        page.append(piece)
+        length += len(piece)
+        if length >= CHARS_PER_PAGE:
+            page_number += 1
+            if page_number > max_pages:
+                raise DocumentTooLargeError(f"{kind} is longer than {max_pages} pages")
+            yield page_number, separator.join(page)
+            page, length = [], 0
+    if page:
+        page_number += 1
+        if page_number > max_pages:
+            raise DocumentTooLargeError(f"{kind} is longer than {max_pages} pages")
+        yield page_number, separator.join(page)
+
+
+def iter_docx_pages(stream, max_pages=MAX_PDF_PAGES, max_bytes=MAX_UPLOAD_BYTES):
+    """Yield (page_number, text) for a DOCX; joining pages with "\n" gives the full text."""
+    _check_size(stream, max_bytes, "DOCX")
+
+    from docx import Document
+
+    stream.seek(0)
+    paragraphs = (paragraph.text for paragraph in Document(stream).paragraphs if paragraph.text.strip())
+    yield from _paginate(paragraphs, "\n", "DOCX", max_pages)
+
+
+def iter_txt_pages(stream, max_pages=MAX_PDF_PAGES, max_bytes=MAX_UPLOAD_BYTES):
+    """Yield (page_number, text) for a UTF-8 text file; joining pages with "" gives the full text."""
+    _check_size(stream, max_bytes, "Text file")
+    stream.seek(0)
+    text = stream.read().decode("utf-8")
+    yield from _paginate(text.splitlines(keepends=True), "", "Text file", max_pages)
+
+
+def parse_file(stream, file_type):
+    """Parse a file-like object into plain text (PDF, DOCX, TXT), within the page and byte caps."""
+    if file_type == PDF_TYPE:
+        return "".join(text for _, text in iter_pdf_pages(stream))
+    elif file_type == DOCX_TYPE:
+        return "\n".join(text for _, text in iter_docx_pages(stream))
+    elif file_type == TXT_TYPE:
+        return "".join(text for _, text in iter_txt_pages(stream))
+    else:
+        raise ValueError("Unsupported file type")
+
 
 def extract_text_from_file(uploaded_file):
-    """Extract text from uploaded files (PDF, DOCX, TXT)."""
-    if uploaded_file.type == "application/pdf":
-        reader = PdfReader(uploaded_file)
-        return "".join(page.extract_text() for page in reader.pages)
-    elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        doc = Document(uploaded_file)
-        return "\n".join(paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip())
-    elif uploaded_file.type == "text/plain":
-        return uploaded_file.read().decode("utf-8")
+    """Extract text from uploaded files (PDF, DOCX, TXT), reusing cached results."""
+    if uploaded_file.type not in (PDF_TYPE, DOCX_TYPE, TXT_TYPE):
+        raise ValueError("Unsupported file type")
+
+    key = content_key(_upload_buffer(uploaded_file), uploaded_file.type)
+    text = _cache.get(key)
+    if text is None:
+        increment("extraction_cache", result="miss")
+        uploaded_file.seek(0)
+        with span("extract", file_type=FILE_KINDS[uploaded_file.type]):
+            text = parse_file(uploaded_file, uploaded_file.type)
+        _cache.put(key, text)
     else:
-        raise ValueError("Unsupported file type")
\ No newline at end of file
+        increment("extraction_cache", result="hit")
+    return text
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """Lazily start the shared extraction pool so it survives Streamlit reruns."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # "spawn" avoids forking the threaded Streamlit server process.
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _parse_bytes(data, file_type):
+    """Parse in a worker process; returns (text, seconds) so the parent can record the timing."""
+    start = time.perf_counter()
+    text = parse_file(io.BytesIO(data), file_type)
+    return text, time.perf_counter() - start
+
+
+def extract_texts_in_parallel(uploaded_files):
+    """
+    Extract text from several uploads, parsing cache misses in a process pool.
+    Yields (index, text, error) tuples as each file completes; `index` is the
+    position in `uploaded_files` so callers can reassemble upload order.
+    """
+    pending = []
+    for index, uploaded_file in enumerate(uploaded_files):
+        if uploaded_file.type not in (PDF_TYPE, DOCX_TYPE, TXT_TYPE):
+            yield index, None, ValueError("Unsupported file type")
+            continue
+        key = content_key(_upload_buffer(uploaded_file), uploaded_file.type)
+        text = _cache.get(key)
+        if text is not None:
+            increment("extraction_cache", result="hit")
+            yield index, text, None
+        else:
+            increment("extraction_cache", result="miss")
+            pending.append((index, key, uploaded_file))
+
+    if len(pending) == 1:
+        # Not worth the IPC round-trip for a single file.
+        index, key, uploaded_file = pending[0]
+        try:
+            uploaded_file.seek(0)
+            with span("extract", file_type=FILE_KINDS[uploaded_file.type]):
+                text = parse_file(uploaded_file, uploaded_file.type)
+        except Exception as e:
+            yield index, None, e
+        else:
+            _cache.put(key, text)
+            yield index, text, None
+        return
+
+    if not pending:
+        return
+
+    pool = _get_process_pool()
+    futures = {
+        pool.submit(_parse_bytes, bytes(_upload_buffer(uploaded_file)), uploaded_file.type):
+            (index, key, uploaded_file.type)
+        for index, key, uploaded_file in pending
+    }
+    for future in as_completed(futures):
+        index, key, file_type = futures[future]
+        try:
+            text, seconds = future.result()
+        except Exception as e:
+            yield index, None, e
+        else:
+            record_span("extract", seconds, file_type=FILE_KINDS[file_type])
+            _cache.put(key, text)
+            yield index, text, None
@@ -0,0 +1,110 @@
+import math
+import re
+import threading
+from collections import Counter
+
+# Keeps "c++", "c#" and "node.js"-style terms together; lowercased.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his how i in is it its
+me my of on or our she so than that the their them they this to was we were what when where which who why
+will with would you your know knows about any candidate many much long
+""".split())
+
+# Reciprocal-rank-fusion constant; 60 is the value from the original RRF paper.
+RRF_K = 60
+
+# "Lookup" questions are short and every one of their terms occurs in the index.
+MAX_LOOKUP_TERMS = 4
+
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def query_terms(query):
+    """Content terms of a query (stopwords and question words dropped), in order, without repeats."""
+    return list(dict.fromkeys(term for term in tokenize(query) if term not in STOPWORDS))
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring. Entries are LangChain
+    Documents; searches can be restricted to one document via metadata["doc_hash"].
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = []
+        self._lengths = []
+        self._postings = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add_documents(self, documents):
+        with self._lock:
+            for document in documents:
+                doc_id = len(self.documents)
+                terms = tokenize(document.page_content)
+                self.documents.append(document)
+                self._lengths.append(len(terms))
+                self._total_length += len(terms)
+                for term, frequency in Counter(terms).items():
+                    self._postings.setdefault(term, []).append((doc_id, frequency))
+
+    def document_frequency(self, term):
+        return len(self._postings.get(term, ()))
+
+    def search(self, query, k=4, doc_hash=None):
+        """Top `k` (Document, score) pairs for `query`, best first; only chunks with a matching term."""
+        with self._lock:
+            count = len(self.documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            scores = {}
+            for term in query_terms(query):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings:
+                    if doc_hash is not None and self.documents[doc_id].metadata.get("doc_hash") != doc_hash:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(self.documents[doc_id], score) for doc_id, score in best]
+
+    def is_lookup_query(self, query):
+        """
+        True for exact-term questions ("does she know Kubernetes?", "years at Acme")
+        that the lexical index can answer alone: a quoted phrase, or a short
+        query whose terms all occur in the indexed chunks.
+        """
+        if re.search(r"\"[^\"]+\"", query):
+            return True
+        terms = query_terms(query)
+        if not terms or len(terms) > MAX_LOOKUP_TERMS:
+            return False
+        return all(self.document_frequency(term) for term in terms)
+
+
+def reciprocal_rank_fusion(rankings, k, rrf_k=RRF_K):
+    """
+    Merge ranked lists of Documents: each list contributes 1 / (rrf_k + rank)
+    per document. Documents are matched on content and metadata.
+    """
+    scores, documents = {}, {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = (document.page_content, tuple(sorted(document.metadata.items())))
+            documents.setdefault(key, document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in best]
@@ -0,0 +1,131 @@
+import os
+import threading
+from utils.rate_limiter import ScheduledResource
+
+# Defaults for the shared HTTP connection pool; override with configure_http_pool().
+POOL_SETTINGS = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 60.0,
+    "timeout": 120.0,
+    "connect_timeout": 10.0,
+}
+
+_http_client = None
+_sdk_clients = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+def configure_http_pool(**settings):
+    """
+    Change pool size/timeouts for clients created from now on.
+    Already-registered clients keep the pool they were built with.
+    """
+    global _http_client
+    unknown = set(settings) - set(POOL_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown pool settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        POOL_SETTINGS.update(settings)
+        _http_client = None
+        _sdk_clients.clear()
+        _clients.clear()
+
+
+def get_http_client():
+    """Return the process-wide keep-alive HTTP client shared by all OpenAI clients."""
+    global _http_client
+    import httpx
+
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=POOL_SETTINGS["max_connections"],
+                    max_keepalive_connections=POOL_SETTINGS["max_keepalive_connections"],
+                    keepalive_expiry=POOL_SETTINGS["keepalive_expiry"],
+                ),
+                timeout=httpx.Timeout(POOL_SETTINGS["timeout"], connect=POOL_SETTINGS["connect_timeout"]),
+            )
+        return _http_client
+
+
+def _get_sdk_clients(api_key, base_url):
+    """
+    Sync/async OpenAI SDK clients per (key, base URL); the sync one uses the
+    shared pool. SDK retries are off because the rate limiter retries instead.
+    """
+    base_url = base_url or os.environ.get("OPENAI_API_BASE")
+    key = (api_key, base_url)
+    with _lock:
+        clients = _sdk_clients.get(key)
+    if clients is None:
+        import openai
+
+        http_client = get_http_client()
+        clients = (
+            openai.OpenAI(
+                api_key=api_key, base_url=base_url, http_client=http_client, timeout=http_client.timeout,
+                max_retries=0,
+            ),
+            openai.AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=http_client.timeout),
+        )
+        with _lock:
+            clients = _sdk_clients.setdefault(key, clients)
+    return clients
+
+
+def _get_or_create(kind, factory, model, api_key, params):
+    key = (kind, model, api_key, tuple(sorted(params.items())))
+    with _lock:
+        client = _clients.get(key)
+    if client is not None:
+        return client
+    sync_client, async_client = _get_sdk_clients(api_key, params.get("openai_api_base"))
+    client = factory(sync_client, async_client)
+    with _lock:
+        # Another session may have won the race; keep a single instance.
+        return _clients.setdefault(key, client)
+
+
+def get_chat_model(model_name, api_key, **params):
+    """Shared ChatOpenAI for (model, key, params), reusing pooled connections."""
+    from langchain.chat_models import ChatOpenAI
+
+    return _get_or_create(
+        "chat",
+        lambda sync_client, async_client: ChatOpenAI(
+            model_name=model_name, openai_api_key=api_key,
+            client=ScheduledResource(sync_client.chat.completions), async_client=async_client.chat.completions, **params
+        ),
+        model_name, api_key, params,
+    )
+
+
+def get_completion_model(api_key, **params):
+    """Shared legacy completion-model client (langchain `OpenAI`)."""
+    from langchain.llms import OpenAI
+
+    return _get_or_create(
+        "completion",
+        lambda sync_client, async_client: OpenAI(
+            openai_api_key=api_key,
+            client=ScheduledResource(sync_client.completions), async_client=async_client.completions, **params
+        ),
+        params.get("model_name"), api_key, params,
+    )
+
+
+def get_embeddings(api_key, **params):
+    """Shared OpenAIEmbeddings client."""
+    from langchain.embeddings.openai import OpenAIEmbeddings
+
+    return _get_or_create(
+        "embeddings",
+        lambda sync_client, async_client: OpenAIEmbeddings(
+            openai_api_key=api_key,
+            client=ScheduledResource(sync_client.embeddings), async_client=async_client.embeddings, **params
+        ),
+        params.get("model"), api_key, params,
+    )
@@ -1,8 +1,11 @@
-from langchain.chat_models import ChatOpenAI
-import os
-import yaml
-
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.chunking import count_tokens
+from utils.metrics import increment, metrics_enabled, record_span, record_tokens, span
+from utils.model_router import get_task_model, run_cascade
+from utils.response_cache import get_response_cache
+from utils.resume_matching import skills_gap_summary, with_omitted_sections
 
 def parse_questions(generated_text):
     """Extract questions using regex."""
@@ -21,25 +24,69 @@ def parse_questions(generated_text):
     return behavioral_questions, technical_questions
 
 
-def load_config(file_name="config.yaml"):
+def _record_usage(model_name, prompt, response):
+    if metrics_enabled():
+        record_tokens(model_name, count_tokens(prompt), count_tokens(response))
+
+
+def _predict(llm, prompt):
+    with span("llm", model=llm.model_name):
+        response = llm.predict(prompt)
+    _record_usage(llm.model_name, prompt, response)
+    return response
+
+
+def predict_with_cache(llm, prompt, use_cache=True):
+    """Run `prompt` through `llm`, going through the response cache when it is enabled."""
+    cache = get_response_cache() if use_cache else None
+    if cache is None:
+        return _predict(llm, prompt)
+
+    response = cache.get(llm.model_name, prompt, llm.temperature)
+    if response is None:
+        increment("response_cache", result="miss")
+        response = _predict(llm, prompt)
+        cache.set(llm.model_name, prompt, llm.temperature, response)
+    else:
+        increment("response_cache", result="hit")
+    return response
+
+
+def stream_prediction(llm, prompt, use_cache=True):
     """
-    Load configuration file from the 'config/' directory, relative to the project root.
+    Yield the response to `prompt` as text chunks as they arrive.
+    A cached response is yielded in one piece; a streamed one is cached once complete.
     """
-    # Determine the project root dynamically
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    # Build the path to the config file
-    config_path = os.path.join(project_root, "config", file_name)
-
-    try:
-        with open(config_path, "r") as file:
-            return yaml.safe_load(file)['openai_api_key']
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Configuration file not found at {config_path}")
-
-def customize_resume(job_description, resume_content, api_key):
-    """Generate customized resume using LLM."""
-    llm = ChatOpenAI(model_name="gpt-4", openai_api_key=api_key)
-    prompt = f"""
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        response = cache.get(llm.model_name, prompt, llm.temperature)
+        if response is not None:
+            increment("response_cache", result="hit")
+            yield response
+            return
+        increment("response_cache", result="miss")
+
+    # Timings include time the consumer spends between chunks (e.g. rendering).
+    parts = []
+    start = time.perf_counter()
+    for chunk in llm.stream(prompt):
+        # Chat models stream message chunks; completion models (kind: completion tiers) stream plain strings.
+        text = chunk if isinstance(chunk, str) else chunk.content
+        if text:
+            if not parts:
+                record_span("llm_first_token", time.perf_counter() - start, model=llm.model_name)
+            parts.append(text)
+            yield text
+    record_span("llm", time.perf_counter() - start, model=llm.model_name)
+    response = "".join(parts)
+    _record_usage(llm.model_name, prompt, response)
+    if cache is not None:
+        cache.set(llm.model_name, prompt, llm.temperature, response)
+
+
+def _resume_prompt(job_description, resume_content, match=None):
+    if match is None:
+        return f"""
     You are a professional career advisor. 
     Based on the job description below, customize the resume to align with it:
 
@@ -51,12 +98,59 @@ def customize_resume(job_description, resume_content, api_key):
 
     Provide a revised version of the resume.
     """
-    return llm.predict(prompt)
+
+    omitted = ""
+    if match["omitted_titles"]:
+        omitted = (
+            "\n    Sections not shown (less relevant to this role): "
+            + ", ".join(match["omitted_titles"])
+            + ". They are appended to your revision unchanged, so do not write them.\n"
+        )
+    return f"""
+    You are a professional career advisor. 
+    Based on the job description below, customize the resume to align with it:
+
+    Job Description:
+    {job_description}
+
+    Candidate's Resume (sections relevant to this role):
+    {match["kept_text"]}
+    {omitted}
+    Skills gap:
+    {skills_gap_summary(match) or "No key job terms found."}
+
+    Provide a revised version of the resume.
+    """
+
+
+def customize_resume(job_description, resume_content, api_key, use_cache=True, match=None):
+    """
+    Generate customized resume using LLM. `match` is a result of
+    utils.resume_matching.match_resume; when given, only the relevant
+    sections and a skills-gap summary are sent instead of the full resume,
+    and the omitted sections are appended to the result verbatim.
+    """
+    prompt = _resume_prompt(job_description, resume_content, match)
+    revised = run_cascade("customize_resume", api_key, lambda llm: predict_with_cache(llm, prompt, use_cache))
+    return with_omitted_sections(revised, match)
 
 
-def generate_mock_questions(job_title, api_key):
-    """Generate mock interview questions with structured formatting."""
-    llm = ChatOpenAI(model_name="gpt-4", openai_api_key=api_key)
+def stream_customized_resume(job_description, resume_content, api_key, use_cache=True, match=None):
+    """Streaming variant of customize_resume; yields text chunks as they arrive."""
+    llm = get_task_model("customize_resume", api_key)
+    yield from stream_prediction(llm, _resume_prompt(job_description, resume_content, match), use_cache)
+    if match is not None and match["omitted_text"]:
+        # Sections left out of the prompt, unchanged.
+        yield "\n\n" + match["omitted_text"]
+
+
+def generate_mock_questions(job_title, api_key, use_cache=True):
+    """
+    Generate mock interview questions with structured formatting. Routed as
+    "mock_questions"; escalates when parse_questions finds no questions.
+    """
+    # "Data Scientist" and "data scientist " ask for the same questions; give them one prompt (and cache entry).
+    job_title = " ".join(job_title.split()).casefold()
     prompt = f"""
     Generate a set of mock interview questions for the role: {job_title}.
     Format the questions as follows:
@@ -68,11 +162,16 @@ def generate_mock_questions(job_title, api_key):
       1. [Question]
       2. [Question]
     """
-    return llm.predict(prompt)
+    return run_cascade(
+        "mock_questions", api_key, lambda llm: predict_with_cache(llm, prompt, use_cache),
+        validator=lambda text: any(parse_questions(text)),
+    )
 
-def evaluate_answer(question, answer, api_key):
-    """Evaluate the user's answer and provide feedback."""
-    llm = ChatOpenAI(model_name="gpt-4o-mini", openai_api_key=api_key)
+def evaluate_answer(question, answer, api_key, use_cache=True):
+    """
+    Evaluate the user's answer and provide feedback. Routed as
+    "evaluate_answer"; escalates when no score can be parsed from the feedback.
+    """
     prompt = f"""
     Evaluate the following answer to the question and provide feedback with a score out of 10:
 
@@ -80,6 +179,41 @@ def evaluate_answer(question, answer, api_key):
     Answer: {answer}
 
     Provide feedback and suggestions for improvement.
+    End with a line of the form "Score: X/10".
     """
-    return llm.predict(prompt)
+    return run_cascade(
+        "evaluate_answer", api_key, lambda llm: predict_with_cache(llm, prompt, use_cache),
+        validator=lambda feedback: parse_score(feedback) is not None,
+    )
+
+
+# "Score: 7/10", "**Score:** 7/10", "Score - 7.5/10"; markdown emphasis and the separator vary between models.
+SCORE_PATTERN = re.compile(r"Score\**\s*[:\-–]\s*\**\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+
 
+def parse_score(feedback):
+    """Pull the numeric score out of "Score: 7/10" style feedback (the last one given), or None."""
+    matches = SCORE_PATTERN.findall(feedback)
+    return float(matches[-1]) if matches else None
+
+
+def evaluate_answers_concurrently(items, api_key, max_workers=4, use_cache=True):
+    """
+    Evaluate (key, question, answer) items with at most `max_workers` in flight.
+    Yields (key, feedback, error) as each evaluation finishes, so callers can
+    render results immediately; total time is close to the slowest single call.
+    """
+    items = list(items)
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {
+            executor.submit(evaluate_answer, question, answer, api_key, use_cache): key
+            for key, question, answer in items
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                yield key, future.result(), None
+            except Exception as e:
+                yield key, None, e
@@ -0,0 +1,243 @@
+"""
+Lightweight in-process instrumentation: timing spans per stage and token
+counters per model, exportable as JSONL events or Prometheus text.
+
+Disabled by default. Turn it on with enable_metrics() or METRICS_ENABLED=1;
+while disabled, span() hands back a shared no-op context manager and the
+record functions return immediately.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Upper bounds (seconds) of the Prometheus histogram buckets for span durations.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Individual events kept for the JSONL export; older ones are dropped.
+MAX_EVENTS = 5000
+PROMETHEUS_PREFIX = "llm_career"
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds, error=False):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.errors += bool(error)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """Thread-safe store of span timings, token counts and plain counters."""
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.spans = {}
+        self.tokens = {}
+        self.counters = {}
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def record_span(self, name, seconds, labels, error=False):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            stats = self.spans.get(key)
+            if stats is None:
+                stats = self.spans[key] = SpanStats()
+            stats.add(seconds, error)
+            self.events.append({
+                "ts": time.time(), "type": "span", "name": name, "seconds": round(seconds, 6),
+                "error": error, **labels,
+            })
+
+    def record_tokens(self, model, prompt_tokens=0, completion_tokens=0):
+        with self._lock:
+            for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+                if count:
+                    self.tokens[(model, kind)] = self.tokens.get((model, kind), 0) + count
+            self.events.append({
+                "ts": time.time(), "type": "tokens", "model": model,
+                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            })
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.tokens.clear()
+            self.counters.clear()
+            self.events.clear()
+
+    def span_summary(self):
+        """One dict per (span, labels): count, total/mean/max seconds and errors."""
+        with self._lock:
+            items = [(name, dict(labels), stats) for (name, labels), stats in self.spans.items()]
+            return [
+                {
+                    "span": name, "labels": labels, "count": stats.count, "errors": stats.errors,
+                    "total_seconds": stats.total, "mean_seconds": stats.total / stats.count,
+                    "max_seconds": stats.max,
+                }
+                for name, labels, stats in sorted(items, key=lambda item: item[0])
+            ]
+
+    def token_summary(self):
+        """{model: {"prompt": n, "completion": n}}"""
+        with self._lock:
+            summary = {}
+            for (model, kind), count in self.tokens.items():
+                summary.setdefault(model, {"prompt": 0, "completion": 0})[kind] = count
+            return summary
+
+    def counter_summary(self):
+        with self._lock:
+            return [
+                {"counter": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+
+    def to_jsonl(self):
+        with self._lock:
+            return "".join(json.dumps(event) + "\n" for event in self.events)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            lines = [
+                f"# HELP {PROMETHEUS_PREFIX}_stage_seconds Time spent per instrumented stage.",
+                f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds histogram",
+            ]
+            for (name, labels), stats in sorted(self.spans.items()):
+                base = _labels({"stage": name, **dict(labels)})
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    bucket_labels = _labels({"stage": name, **dict(labels), "le": repr(bound)})
+                    lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_bucket{bucket_labels} {cumulative}")
+                inf_labels = _labels({"stage": name, **dict(labels), "le": "+Inf"})
+                lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_bucket{inf_labels} {stats.count}")
+                lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_sum{base} {stats.total}")
+                lines.append(f"{PROMETHEUS_PREFIX}_stage_seconds_count{base} {stats.count}")
+
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_stage_errors_total Instrumented stages that raised.")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_stage_errors_total counter")
+            for (name, labels), stats in sorted(self.spans.items()):
+                lines.append(
+                    f"{PROMETHEUS_PREFIX}_stage_errors_total{_labels({'stage': name, **dict(labels)})} {stats.errors}"
+                )
+
+            lines.append(f"# HELP {PROMETHEUS_PREFIX}_tokens_total LLM tokens by model and kind.")
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_tokens_total counter")
+            for (model, kind), count in sorted(self.tokens.items()):
+                lines.append(f"{PROMETHEUS_PREFIX}_tokens_total{_labels({'model': model, 'kind': kind})} {count}")
+
+            previous = None
+            for (name, labels), value in sorted(self.counters.items()):
+                if name != previous:
+                    lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name}_total counter")
+                    previous = name
+                lines.append(f"{PROMETHEUS_PREFIX}_{name}_total{_labels(dict(labels))} {value}")
+            return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _registry.record_span(self.name, time.perf_counter() - self.start, self.labels, error=exc_type is not None)
+        return False
+
+
+_registry = MetricsRegistry()
+_enabled = False
+
+
+def enable_metrics():
+    global _enabled
+    _enabled = True
+
+
+def disable_metrics():
+    global _enabled
+    _enabled = False
+
+
+def metrics_enabled():
+    return _enabled
+
+
+def get_registry():
+    return _registry
+
+
+def span(name, **labels):
+    """Time the enclosed block as stage `name`; keep `labels` low-cardinality (model, file type...)."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
+
+def record_span(name, seconds, **labels):
+    """Record a duration measured elsewhere (e.g. in a worker process)."""
+    if _enabled:
+        _registry.record_span(name, seconds, labels)
+
+
+def record_tokens(model, prompt_tokens=0, completion_tokens=0):
+    if _enabled:
+        _registry.record_tokens(model, prompt_tokens, completion_tokens)
+
+
+def increment(name, amount=1, **labels):
+    """Add to counter `name`, exported as <prefix>_<name>_total; `name` must be a valid metric name."""
+    if _enabled:
+        _registry.increment(name, labels, amount)
+
+
+def write_jsonl(path):
+    """Append the buffered events to `path`, one JSON object per line."""
+    with open(path, "a") as file:
+        file.write(_registry.to_jsonl())
+
+
+def prometheus_text():
+    return _registry.to_prometheus()
+
+
+if os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes"):
+    enable_metrics()
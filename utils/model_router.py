@@ -0,0 +1,80 @@
+import time
+from utils.config import get_section
+from utils.llm_clients import get_chat_model, get_completion_model
+from utils.metrics import increment, record_span
+
+# Used for tiers and tasks missing from the `routing:` section of config/config.yaml.
+DEFAULT_ROUTING = {
+    "tiers": {
+        "fast": {"model": "gpt-4o-mini"},
+        "strong": {"model": "gpt-4"},
+        "completion": {"model": "gpt-3.5-turbo-instruct", "kind": "completion"},
+    },
+    "tasks": {
+        "customize_resume": ["strong"],
+        "mock_questions": ["fast", "strong"],
+        "evaluate_answer": ["fast", "strong"],
+        "file_qa": ["strong"],
+        "rag_answer": ["completion"],
+        "quickstart": ["completion"],
+    },
+}
+
+
+def routing_table():
+    """(tiers, tasks) from config merged over DEFAULT_ROUTING; re-read when config.yaml changes."""
+    routing = get_section("routing")
+    tiers = dict(DEFAULT_ROUTING["tiers"], **(routing.get("tiers") or {}))
+    tasks = dict(DEFAULT_ROUTING["tasks"], **(routing.get("tasks") or {}))
+    return tiers, tasks
+
+
+def route(task):
+    """Tier names `task` tries, in order."""
+    tiers, tasks = routing_table()
+    if task not in tasks:
+        raise ValueError(f"No route for task {task!r}; add it under routing.tasks in config.yaml")
+    names = tasks[task]
+    names = [names] if isinstance(names, str) else list(names)
+    unknown = [name for name in names if name not in tiers]
+    if unknown or not names:
+        raise ValueError(f"Route for {task!r} uses unknown tiers: {', '.join(unknown) or '(none)'}")
+    return names
+
+
+def get_tier_model(tier, api_key, **params):
+    """Shared client for `tier`; extra tier settings (e.g. temperature) are defaults for `params`."""
+    tiers, _ = routing_table()
+    settings = dict(tiers[tier])
+    kind = settings.pop("kind", "chat")
+    model = settings.pop("model")
+    params = dict(settings, **params)
+    if kind == "completion":
+        return get_completion_model(api_key, model_name=model, **params)
+    if kind != "chat":
+        raise ValueError(f"Tier {tier!r} has unknown kind {kind!r}; use chat or completion")
+    return get_chat_model(model, api_key, **params)
+
+
+def get_task_model(task, api_key, **params):
+    """Model of the first tier routed for `task`, for callers that cannot escalate (streaming, chains)."""
+    return get_tier_model(route(task)[0], api_key, **params)
+
+
+def run_cascade(task, api_key, call, validator=None, **params):
+    """
+    Run `call(llm)` on each tier routed for `task` in turn, stopping at the
+    first result `validator` accepts (or the first result at all without a
+    validator). The last tier's result is returned even if it fails validation.
+    Records per-tier latency and how often each tier escalates.
+    """
+    tiers = route(task)
+    for position, tier in enumerate(tiers):
+        llm = get_tier_model(tier, api_key, **params)
+        start = time.perf_counter()
+        result = call(llm)
+        record_span("route", time.perf_counter() - start, task=task, tier=tier)
+        increment("route_calls", task=task, tier=tier)
+        if validator is None or position == len(tiers) - 1 or validator(result):
+            return result
+        increment("route_escalations", task=task, tier=tier)
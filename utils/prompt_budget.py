@@ -0,0 +1,163 @@
+from concurrent.futures import ThreadPoolExecutor
+from utils.chunking import chunk_text, count_tokens, get_encoding
+from utils.llm_utils import predict_with_cache
+
+# Context window sizes (prompt + completion) of the chat models used in this app.
+CONTEXT_WINDOWS = {
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free for the model's answer.
+RESPONSE_RESERVE = 1024
+
+
+def section_header(name):
+    return f"\n\n--- Content from {name} ---\n\n"
+
+
+def build_direct_prompt(sections, job_content, question):
+    """The single prompt used when all (name, text) sections fit the budget."""
+    prompt = "Using the following combined content, answer the user's question."
+    if job_content.strip():
+        prompt += f"\n\nJob Content:\n{job_content}"
+    combined_text = "".join(section_header(name) + text for name, text in sections)
+    prompt += f"\n\nCombined Content from Files:\n{combined_text}\n\nQuestion: {question}"
+    return prompt
+
+
+def _map_prompt(name, text, job_content, question):
+    prompt = (
+        f"The following is an excerpt from the file '{name}'. Using only this excerpt, "
+        "write the facts relevant to the user's question, and say so briefly if there are none."
+    )
+    if job_content.strip():
+        prompt += f"\n\nJob Content:\n{job_content}"
+    return prompt + f"\n\nExcerpt:\n{text}\n\nQuestion: {question}"
+
+
+def build_reduce_prompt(partials, job_content, question):
+    """Prompt that merges per-file partial answers into one final answer."""
+    prompt = (
+        "Several files were analysed separately for the user's question. "
+        "Combine the notes below into one complete answer."
+    )
+    if job_content.strip():
+        prompt += f"\n\nJob Content:\n{job_content}"
+    notes = "".join(section_header(name) + answer for name, answer in partials)
+    return prompt + f"\n\nNotes per File:{notes}\n\nQuestion: {question}"
+
+
+def prompt_budget(model_name, response_reserve=RESPONSE_RESERVE):
+    return CONTEXT_WINDOWS.get(model_name, DEFAULT_CONTEXT_WINDOW) - response_reserve
+
+
+def plan_prompt(sections, job_content, question, model_name, response_reserve=RESPONSE_RESERVE):
+    """
+    Count tokens per section and pick a strategy: "direct" when the whole
+    prompt fits the model's budget, otherwise "map_reduce".
+    """
+    section_tokens = {name: count_tokens(section_header(name) + text) for name, text in sections}
+    direct_tokens = count_tokens(build_direct_prompt([], job_content, question)) + sum(section_tokens.values())
+    budget = prompt_budget(model_name, response_reserve)
+    return {
+        "strategy": "direct" if direct_tokens <= budget else "map_reduce",
+        "budget": budget,
+        "direct_prompt_tokens": direct_tokens,
+        "section_tokens": section_tokens,
+    }
+
+
+def _split_to_budget(name, text, job_content, question, budget):
+    """Split a section into pieces whose map prompts each fit `budget`."""
+    overhead = count_tokens(_map_prompt(name, "", job_content, question))
+    room = budget - overhead
+    if room <= 0:
+        raise ValueError("The job content and question alone exceed the model's context window.")
+    if count_tokens(text) <= room:
+        return [(name, text)]
+    chunks = chunk_text(text, chunk_tokens=room, overlap=min(100, room // 10))
+    return [(f"{name} (part {i + 1}/{len(chunks)})", chunk.page_content) for i, chunk in enumerate(chunks)]
+
+
+def map_partial_answers(llm, sections, job_content, question, budget, max_workers=4, use_cache=True):
+    """
+    Answer the question against each section concurrently.
+    Returns ([(name, partial_answer)], usage) in section order.
+    """
+    pieces = []
+    for name, text in sections:
+        pieces.extend(_split_to_budget(name, text, job_content, question, budget))
+    prompts = [_map_prompt(name, text, job_content, question) for name, text in pieces]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as executor:
+        answers = list(executor.map(lambda prompt: predict_with_cache(llm, prompt, use_cache), prompts))
+
+    usage = {
+        "calls": len(prompts),
+        "prompt_tokens": sum(count_tokens(prompt) for prompt in prompts),
+        "completion_tokens": sum(count_tokens(answer) for answer in answers),
+    }
+    return [(name, answer) for (name, _), answer in zip(pieces, answers)], usage
+
+
+def _truncate_to_budget(partials, job_content, question, budget):
+    """
+    Cut partial answers so their reduce prompt fits `budget`. Room is shared
+    evenly; notes shorter than their share keep all of it and pass the rest on.
+    Returns (partials, number of notes truncated).
+    """
+    room = budget - count_tokens(build_reduce_prompt([(name, "") for name, _ in partials], job_content, question))
+    if room <= 0:
+        raise ValueError("The job content and question alone exceed the model's context window.")
+    encoding = get_encoding()
+    tokens = [encoding.encode(answer, disallowed_special=()) for _, answer in partials]
+    while True:
+        allowed, left = {}, room
+        for position, index in enumerate(sorted(range(len(tokens)), key=lambda i: len(tokens[i]))):
+            allowed[index] = min(len(tokens[index]), left // (len(tokens) - position))
+            left -= allowed[index]
+        result = [
+            (name, answer if allowed[i] == len(tokens[i]) else encoding.decode(tokens[i][:allowed[i]]))
+            for i, (name, answer) in enumerate(partials)
+        ]
+        # Decoded cut-offs can re-encode a little longer; shrink and retry until it fits.
+        if count_tokens(build_reduce_prompt(result, job_content, question)) <= budget or room <= 0:
+            return result, sum(allowed[i] < len(tokens[i]) for i in range(len(tokens)))
+        room -= max(1, room // 20)
+
+
+def collapse_partials(llm, partials, job_content, question, budget, max_workers=4, use_cache=True):
+    """
+    Merge partial answers in groups until the final reduce prompt fits `budget`.
+    If merging cannot shrink them enough, the notes are truncated to fit and
+    usage["truncated"] counts how many were cut. Returns (partials, usage);
+    usage is zero when they already fit.
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "truncated": 0}
+    while count_tokens(build_reduce_prompt(partials, job_content, question)) > budget and len(partials) > 1:
+        groups, group = [], []
+        for partial in partials:
+            if group and count_tokens(build_reduce_prompt(group + [partial], job_content, question)) > budget:
+                groups.append(group)
+                group = []
+            group.append(partial)
+        groups.append(group)
+        if len(groups) == len(partials):
+            # Each partial already fills the budget on its own; merging cannot shrink further.
+            break
+
+        prompts = [build_reduce_prompt(group, job_content, question) for group in groups]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as executor:
+            answers = list(executor.map(lambda prompt: predict_with_cache(llm, prompt, use_cache), prompts))
+        usage["calls"] += len(prompts)
+        usage["prompt_tokens"] += sum(count_tokens(prompt) for prompt in prompts)
+        usage["completion_tokens"] += sum(count_tokens(answer) for answer in answers)
+        partials = [(f"merged notes {i + 1}", answer) for i, answer in enumerate(answers)]
+    if count_tokens(build_reduce_prompt(partials, job_content, question)) > budget:
+        partials, usage["truncated"] = _truncate_to_budget(partials, job_content, question, budget)
+    return partials, usage
@@ -0,0 +1,328 @@
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from utils.config import get_section
+from utils.metrics import increment, record_span
+
+# Scheduling priorities; lower values are served first.
+INTERACTIVE = 0
+BATCH = 10
+
+# Limits for models without an entry in MODEL_LIMITS. The `rate_limits:` section of
+# config/config.yaml overrides both on first use; change them with configure_rate_limits().
+DEFAULT_LIMITS = {
+    "requests_per_minute": 500,
+    "tokens_per_minute": 200_000,
+    "max_concurrency": 8,
+}
+MODEL_LIMITS = {}
+
+# Buckets hold at most this many seconds' worth of budget, so an idle model cannot burst a full minute at once.
+BURST_SECONDS = 10.0
+
+# Retries of a 429/5xx response, with full-jitter exponential backoff between them.
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# Concurrency is halved at most once per this many seconds, so one burst of 429s counts once.
+DECREASE_COOLDOWN = 1.0
+
+# Completion tokens budgeted when a request sets no max_tokens; corrected from `usage` afterwards.
+COMPLETION_ESTIMATE = 256
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def scheduling_priority(level):
+    """Run OpenAI calls made in this block (on this thread/context) at priority `level`."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute`; the level may go negative when a request overdraws it."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` (capped at capacity, so huge requests still run) is available."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= amount
+
+    def give_back(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _ModelState:
+    def __init__(self, limits):
+        self.requests = TokenBucket(limits["requests_per_minute"]) if limits["requests_per_minute"] else None
+        self.tokens = TokenBucket(limits["tokens_per_minute"]) if limits["tokens_per_minute"] else None
+        self.max_concurrency = limits["max_concurrency"]
+        # Additive-increase / multiplicative-decrease concurrency limit.
+        self.concurrency = float(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = []
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.throttled = 0
+
+    def wait_time(self, tokens, now):
+        delay = self.blocked_until - now
+        if self.requests is not None:
+            delay = max(delay, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.wait_time(tokens, now))
+        return delay
+
+
+def estimate_tokens(request):
+    """Rough size of an OpenAI request (4 characters per token) plus the completion it may produce."""
+    def size(value):
+        if isinstance(value, str):
+            return len(value) // 4 + 1
+        if isinstance(value, dict):
+            return size(value.get("content"))
+        if isinstance(value, (list, tuple)):
+            # Embedding inputs may already be token ids.
+            return len(value) if value and isinstance(value[0], int) else sum(size(item) for item in value)
+        return 0
+
+    prompt = size(request.get("messages")) + size(request.get("prompt")) + size(request.get("input"))
+    if "input" in request:
+        return prompt
+    return prompt + (request.get("max_tokens") or COMPLETION_ESTIMATE)
+
+
+def _status_code(error):
+    return getattr(error, "status_code", None)
+
+
+def _retry_after(error):
+    """Server-requested delay from a 429/503 response, in seconds, if it sent one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return min(BACKOFF_MAX, float(headers[name]) * scale)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _usage_tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def _release_after(stream, release):
+    """Iterate a streamed response, keeping its concurrency slot until the stream ends or is dropped."""
+    try:
+        yield from stream
+    finally:
+        release()
+
+
+class RateLimiter:
+    """
+    Per-model scheduler for OpenAI calls: token buckets for requests/min and
+    tokens/min, an adaptive concurrency limit that halves on 429/5xx and grows
+    back by one slot per window of successes, and a priority queue so
+    interactive calls start before queued batch work.
+    """
+
+    def __init__(self, limits=None, model_limits=None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.model_limits = {model: dict(self.limits, **overrides) for model, overrides in (model_limits or {}).items()}
+        self._models = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _state(self, model):
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState(self.model_limits.get(model, self.limits))
+        return state
+
+    def acquire(self, model, tokens, priority=INTERACTIVE):
+        """Block until `model` has a free slot and budget for `tokens`; lower `priority` values go first."""
+        start = time.monotonic()
+        with self._condition:
+            state = self._state(model)
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(state.waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = None
+                    # Only the head of the queue may start, so batch work never overtakes a waiting interactive call.
+                    if state.waiting[0] == ticket and state.in_flight < int(state.concurrency):
+                        delay = state.wait_time(tokens, now)
+                        if delay <= 0:
+                            break
+                    self._condition.wait(delay)
+            finally:
+                state.waiting.remove(ticket)
+                heapq.heapify(state.waiting)
+            if state.requests is not None:
+                state.requests.take(1, now)
+            if state.tokens is not None:
+                state.tokens.take(tokens, now)
+            state.in_flight += 1
+            self._condition.notify_all()
+        record_span("rate_limit_wait", time.monotonic() - start, model=model,
+                    priority="interactive" if priority <= INTERACTIVE else "batch")
+
+    def release(self, model, tokens, used_tokens=None, throttled=False, retry_after=None):
+        """Return a slot taken by acquire(); `used_tokens` corrects the token estimate."""
+        with self._condition:
+            state = self._state(model)
+            state.in_flight -= 1
+            if used_tokens is not None and state.tokens is not None:
+                state.tokens.give_back(tokens - used_tokens)
+            now = time.monotonic()
+            if throttled:
+                state.throttled += 1
+                if now - state.last_decrease >= DECREASE_COOLDOWN:
+                    state.concurrency = max(1.0, state.concurrency / 2)
+                    state.last_decrease = now
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until, now + retry_after)
+            else:
+                state.concurrency = min(state.max_concurrency, state.concurrency + 1.0 / state.concurrency)
+            self._condition.notify_all()
+
+    def call(self, model, function, tokens, priority=None, stream=False):
+        """
+        Run `function()` (one OpenAI request) under `model`'s limits, retrying
+        429 and 5xx errors with jittered exponential backoff.
+        """
+        priority = current_priority() if priority is None else priority
+        for attempt in itertools.count():
+            self.acquire(model, tokens, priority)
+            try:
+                response = function()
+            except Exception as error:
+                status = _status_code(error)
+                retryable = status is not None and (status == 429 or status >= 500)
+                retry_after = _retry_after(error) if retryable else None
+                # Rejected requests are not billed; only their request slot stays spent.
+                self.release(model, tokens, used_tokens=0, throttled=retryable, retry_after=retry_after)
+                if not retryable or attempt >= MAX_RETRIES:
+                    raise
+                increment("llm_retries", model=model, status=str(status))
+                time.sleep(max(retry_after or 0.0, random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))))
+                continue
+            if stream:
+                return _release_after(response, lambda: self.release(model, tokens))
+            self.release(model, tokens, used_tokens=_usage_tokens(response))
+            return response
+
+    def snapshot(self):
+        """Per-model limiter state, for debugging and benchmarks."""
+        with self._condition:
+            return {
+                model: {
+                    "concurrency": round(state.concurrency, 2),
+                    "in_flight": state.in_flight,
+                    "waiting": len(state.waiting),
+                    "throttled": state.throttled,
+                }
+                for model, state in self._models.items()
+            }
+
+
+class ScheduledResource:
+    """
+    Wraps an OpenAI SDK resource (chat.completions, completions, embeddings)
+    so every create() goes through the rate limiter. Anything else is passed through.
+    """
+
+    def __init__(self, resource, limiter=None):
+        self._resource = resource
+        self._limiter = limiter
+
+    def create(self, **request):
+        limiter = self._limiter or get_rate_limiter()
+        return limiter.call(
+            request.get("model", "default"), lambda: self._resource.create(**request),
+            estimate_tokens(request), stream=bool(request.get("stream")),
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+
+_limiter = None
+_configured = False
+_lock = threading.Lock()
+_config_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The process-wide limiter shared by every session and worker thread."""
+    global _limiter
+    if not _configured:
+        with _config_lock:
+            if not _configured:
+                load_rate_limits()
+    with _lock:
+        if _limiter is None:
+            _limiter = RateLimiter(DEFAULT_LIMITS, MODEL_LIMITS)
+        return _limiter
+
+
+def configure_rate_limits(model=None, **limits):
+    """
+    Change the default limits, or one model's with `model=`, for calls made
+    from now on (requests_per_minute, tokens_per_minute, max_concurrency; 0
+    disables a bucket). Resets the adaptive state of every model. Once called,
+    the config file is no longer applied implicitly.
+    """
+    global _limiter, _configured
+    unknown = set(limits) - set(DEFAULT_LIMITS)
+    if unknown:
+        raise ValueError(f"Unknown rate limit settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        if model is None:
+            DEFAULT_LIMITS.update(limits)
+        else:
+            MODEL_LIMITS.setdefault(model, {}).update(limits)
+        _limiter = None
+        _configured = True
+
+
+def load_rate_limits(file_name="config.yaml"):
+    """
+    Apply the `rate_limits:` section of config/<file_name>: `default` limits
+    plus per-model overrides under `models`. A missing section keeps DEFAULT_LIMITS.
+    """
+    section = get_section("rate_limits", file_name)
+    configure_rate_limits(**(section.get("default") or {}))
+    for model, limits in (section.get("models") or {}).items():
+        configure_rate_limits(model, **(limits or {}))
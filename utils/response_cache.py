@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_SQLITE_PATH = "response_cache.db"
+
+
+def normalize_prompt(prompt):
+    """
+    Collapse runs of whitespace so prompts that differ only in indentation or
+    line breaks share an entry. Case is kept: resume and job text are content.
+    """
+    return " ".join(prompt.split())
+
+
+def make_key(model, prompt, temperature):
+    payload = json.dumps([model, prompt, temperature])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryResponseCache:
+    """In-process LRU of LLM responses with a time-to-live."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key, response):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache:
+    """LLM responses persisted in SQLite, with LRU eviction and a time-to-live."""
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if created_at + self.ttl_seconds < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            return response
+
+    def set(self, key, response):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    """
+    Keys responses by (model, normalized prompt, temperature), so prompts that
+    differ only in whitespace share a single entry.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _key(self, model, prompt, temperature):
+        return make_key(model, normalize_prompt(prompt), temperature)
+
+    def get(self, model, prompt, temperature):
+        return self.backend.get(self._key(model, prompt, temperature))
+
+    def set(self, model, prompt, temperature, response):
+        self.backend.set(self._key(model, prompt, temperature), response)
+
+
+_active_cache = None
+
+
+def enable_response_cache(backend="memory", max_entries=DEFAULT_MAX_ENTRIES,
+                          ttl_seconds=DEFAULT_TTL_SECONDS, path=DEFAULT_SQLITE_PATH):
+    """Turn on response caching for utils.llm_utils with a "memory" or "sqlite" backend."""
+    global _active_cache
+    if backend == "memory":
+        store = MemoryResponseCache(max_entries, ttl_seconds)
+    elif backend == "sqlite":
+        store = SQLiteResponseCache(path, max_entries, ttl_seconds)
+    else:
+        raise ValueError(f"Unknown response cache backend: {backend}")
+    _active_cache = ResponseCache(store)
+    return _active_cache
+
+
+def disable_response_cache():
+    global _active_cache
+    _active_cache = None
+
+
+def get_response_cache():
+    """The active ResponseCache, or None when caching is off (the default)."""
+    return _active_cache
+
+
+if os.environ.get("LLM_RESPONSE_CACHE"):
+    enable_response_cache(os.environ["LLM_RESPONSE_CACHE"])
@@ -0,0 +1,183 @@
+import re
+import time
+from utils.chunking import count_tokens
+from utils.lexical_index import STOPWORDS, tokenize
+from utils.metrics import span
+
+# Section headings recognised on a line of their own (optionally followed by ":").
+KNOWN_HEADINGS = {
+    "summary", "profile", "objective", "about", "about me", "experience", "work experience",
+    "professional experience", "employment", "employment history", "education", "skills",
+    "technical skills", "core skills", "projects", "certifications", "certificates", "awards",
+    "publications", "languages", "interests", "hobbies", "volunteering", "references", "achievements",
+}
+MAX_HEADING_WORDS = 4
+
+# Without headings, the resume is split into blocks of this many lines.
+FALLBACK_BLOCK_LINES = 8
+
+# Sections scoring below this fraction of the best section's score are left out.
+RELATIVE_THRESHOLD = 0.35
+
+# Contact details that mark a section as the resume header when it has no "Header" title.
+CONTACT_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.-]+"  # email
+    r"|\+?\d[\d ().-]{7,}\d"  # phone number
+    r"|linkedin\.com/|github\.com/",
+    re.IGNORECASE,
+)
+
+# Job-description terms checked for the skills-gap summary.
+MAX_GAP_TERMS = 15
+
+
+def _is_heading(line):
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped.split()) > MAX_HEADING_WORDS:
+        return False
+    if stripped.lower() in KNOWN_HEADINGS:
+        return True
+    # All-caps lines ("EXPERIENCE", "TECHNICAL SKILLS") are headings too.
+    return stripped.isupper() and any(char.isalpha() for char in stripped)
+
+
+def split_sections(resume_text):
+    """
+    Split a resume into (title, text) sections at heading lines. Text before
+    the first heading (name, contact details) becomes the "Header" section.
+    Falls back to fixed-size blocks of lines when no headings are found.
+    """
+    lines = resume_text.splitlines()
+    sections, title, body = [], "Header", []
+    for line in lines:
+        if _is_heading(line):
+            if any(text.strip() for text in body):
+                sections.append((title, "\n".join(body).strip()))
+            title, body = line.strip().rstrip(":").strip(), []
+        else:
+            body.append(line)
+    if any(text.strip() for text in body):
+        sections.append((title, "\n".join(body).strip()))
+
+    if len(sections) <= 1:
+        content = [line for line in lines if line.strip()]
+        sections = [
+            (f"Part {i // FALLBACK_BLOCK_LINES + 1}", "\n".join(content[i:i + FALLBACK_BLOCK_LINES]))
+            for i in range(0, len(content), FALLBACK_BLOCK_LINES)
+        ]
+    return sections
+
+
+def is_header_section(title, text):
+    """True for the resume's name/contact block: text before the first heading, or any section with contact details."""
+    return title == "Header" or bool(CONTACT_PATTERN.search(text))
+
+
+def _section_text(sections):
+    return "\n\n".join(f"{title}:\n{text}" for title, text in sections)
+
+
+def _terms(text):
+    return [term for term in tokenize(text) if term not in STOPWORDS and len(term) > 1]
+
+
+def tfidf_scores(section_texts, job_description):
+    """
+    Cosine similarity of each section to the job description over TF-IDF
+    vectors. Returns (scores, vocabulary, job_vector, presence) where
+    `presence` is a sections x vocabulary boolean matrix.
+    """
+    import numpy as np
+
+    documents = [_terms(text) for text in section_texts] + [_terms(job_description)]
+    vocabulary = {term: i for i, term in enumerate(dict.fromkeys(term for terms in documents for term in terms))}
+    counts = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, terms in enumerate(documents):
+        if terms:
+            np.add.at(counts[row], [vocabulary[term] for term in terms], 1.0)
+
+    document_frequency = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    weights = np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+
+    scores = weights[:-1] @ weights[-1]
+    return scores, vocabulary, weights[-1], counts[:-1] > 0
+
+
+def match_resume(resume_text, job_description, relative_threshold=RELATIVE_THRESHOLD):
+    """
+    Score resume sections against the job description and keep the relevant ones.
+
+    Returns a dict with the kept text, the omitted sections' original text
+    (for with_omitted_sections), a skills-gap summary ("matched" and
+    "missing" job terms), per-section scores, the absolute threshold used and
+    the resume token counts before and after trimming.
+    """
+    start = time.perf_counter()
+    with span("resume_match"):
+        sections = split_sections(resume_text)
+        if not sections or not _terms(job_description):
+            kept = [True] * len(sections)
+            scores = [0.0] * len(sections)
+            threshold = 0.0
+            matched, missing = [], []
+        else:
+            scores, vocabulary, job_vector, presence = tfidf_scores(
+                [text for _, text in sections], job_description
+            )
+            threshold = float(scores.max()) * relative_threshold
+            # The header carries name and contact details; it is always sent.
+            kept = [
+                bool(score >= threshold) or is_header_section(title, text)
+                for (title, text), score in zip(sections, scores)
+            ]
+
+            # The most distinctive job terms, split by whether the resume mentions them anywhere.
+            key_terms = [term for term, index in sorted(
+                vocabulary.items(), key=lambda item: job_vector[item[1]], reverse=True
+            ) if job_vector[index] > 0][:MAX_GAP_TERMS]
+            anywhere = presence.any(axis=0)
+            matched = [term for term in key_terms if anywhere[vocabulary[term]]]
+            missing = [term for term in key_terms if not anywhere[vocabulary[term]]]
+
+        kept_text = _section_text(section for section, keep in zip(sections, kept) if keep)
+        omitted_text = _section_text(section for section, keep in zip(sections, kept) if not keep)
+        original_tokens = count_tokens(resume_text)
+        trimmed_tokens = count_tokens(kept_text)
+
+    return {
+        "kept_text": kept_text,
+        "omitted_titles": [title for (title, _), keep in zip(sections, kept) if not keep],
+        "omitted_text": omitted_text,
+        "sections": [
+            {"title": title, "score": round(float(score), 3), "kept": bool(keep), "tokens": count_tokens(text)}
+            for (title, text), score, keep in zip(sections, scores, kept)
+        ],
+        "threshold": round(threshold, 3),
+        "relative_threshold": relative_threshold,
+        "matched_terms": matched,
+        "missing_terms": missing,
+        "original_tokens": original_tokens,
+        "trimmed_tokens": trimmed_tokens,
+        "saved_tokens": max(0, original_tokens - trimmed_tokens),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def with_omitted_sections(revised_text, match):
+    """`revised_text` followed by the sections the match left out of the prompt, verbatim."""
+    if match is None or not match["omitted_text"]:
+        return revised_text
+    return revised_text.rstrip() + "\n\n" + match["omitted_text"]
+
+
+def skills_gap_summary(match):
+    """One or two lines naming job terms the resume covers and the ones it never mentions."""
+    lines = []
+    if match["matched_terms"]:
+        lines.append("Covered in the resume: " + ", ".join(match["matched_terms"]))
+    if match["missing_terms"]:
+        lines.append("Not mentioned in the resume: " + ", ".join(match["missing_terms"]))
+    return "\n".join(lines)
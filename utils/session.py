@@ -0,0 +1,136 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import streamlit as st
+
+VECTORSTORE_ROOT = "local_vectorstore"
+SCRATCH_ROOT = os.path.join(tempfile.gettempdir(), "llm_career_sessions")
+
+# Scratch directories untouched for this long are treated as abandoned sessions.
+SCRATCH_MAX_AGE_SECONDS = 6 * 60 * 60
+
+# What st.experimental_user reports for the email when running locally without auth.
+LOCAL_PLACEHOLDER_EMAIL = "test@example.com"
+
+
+def get_session_id():
+    """Stable random id for the current browser session."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+
+def get_user_id():
+    """
+    User key for stored progress: the signed-in viewer's email when the host
+    authenticates users (e.g. Community Cloud viewer auth), otherwise the
+    single-user DEFAULT_USER_ID, which also owns rows saved before per-user
+    tracking. Nothing the browser can set (query parameters) is trusted.
+    """
+    from utils.database_utils import DEFAULT_USER_ID
+
+    email = st.experimental_user.get("email")
+    if email and email != LOCAL_PLACEHOLDER_EMAIL:
+        return email
+    return DEFAULT_USER_ID
+
+
+def _cleanup_stale_scratch_dirs(now):
+    try:
+        entries = os.scandir(SCRATCH_ROOT)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir() and now - entry.stat().st_mtime > SCRATCH_MAX_AGE_SECONDS:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                continue
+
+
+def session_scratch_dir():
+    """
+    Private on-disk directory for the current session's temporary files.
+    Every call refreshes its mtime, which is what keeps it from being cleaned up.
+    """
+    path = os.path.join(SCRATCH_ROOT, get_session_id())
+    if not os.path.isdir(path):
+        _cleanup_stale_scratch_dirs(time.time())
+        os.makedirs(path, exist_ok=True)
+    else:
+        os.utime(path)
+    return path
+
+
+def _keep_alive(documents):
+    # Spilled files live in the scratch directory; touch it on every rerun that still uses them.
+    if any(document.spilled for document in documents):
+        session_scratch_dir()
+
+
+def session_documents(key, source, load):
+    """
+    DocumentHandles for `source` (e.g. the uploads' file ids), kept in
+    st.session_state[key]. `load()` returns [(name, text)] and only runs when
+    `source` changes; the previous source's handles are closed once it
+    succeeds. If `load()` raises, the previous documents stay in place.
+    """
+    from utils.document_handle import DocumentHandle
+
+    stored = st.session_state.get(key)
+    if stored is not None and stored[0] == source:
+        _keep_alive(stored[1])
+        return stored[1]
+    directory = session_scratch_dir()
+    documents = [DocumentHandle(text, name, directory=directory) for name, text in load()]
+    if stored is not None:
+        for document in stored[1]:
+            document.close()
+    st.session_state[key] = (source, documents)
+    return documents
+
+
+def stored_documents(key):
+    """Handles last stored by session_documents() under `key`, or []."""
+    stored = st.session_state.get(key)
+    if stored is None:
+        return []
+    _keep_alive(stored[1])
+    return stored[1]
+
+
+@st.cache_resource
+def apply_rate_limits():
+    """Apply the `rate_limits:` section of config.yaml once per server process, not on every rerun."""
+    from utils.rate_limiter import load_rate_limits
+
+    load_rate_limits()
+
+
+@st.cache_resource
+def shared_embeddings(api_key):
+    """Cached embeddings client shared by every session using `api_key`."""
+    from utils.embedding_cache import cached_embeddings
+    from utils.llm_clients import get_embeddings
+
+    return cached_embeddings(get_embeddings(api_key))
+
+
+@st.cache_resource(max_entries=32)
+def shared_vector_store(doc_hash, api_key):
+    """
+    Index for one document, shared read-only across sessions using the same
+    API key. The key is part of the cache key so one user's queries are never
+    embedded (and billed) on another's key; each key also gets its own
+    directory, and re-indexing a document under a new key mostly hits the
+    embedding cache. Each store has its own lock, so sessions working on
+    different documents never wait on each other.
+    """
+    from utils.vector_store import PersistentVectorStore
+
+    key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return PersistentVectorStore(os.path.join(VECTORSTORE_ROOT, key_id, doc_hash), shared_embeddings(api_key))
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+from typing import Any, Optional
+from langchain.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from utils.chunking import batch_by_tokens
+from utils.lexical_index import BM25Index, reciprocal_rank_fusion
+from utils.metrics import increment
+
+MANIFEST_FILE = "doc_hashes.json"
+
+# vector: FAISS only. lexical: BM25 only, no embedding call. hybrid: both, merged
+# with reciprocal-rank fusion. auto: lexical for exact-term lookups, else hybrid.
+RETRIEVAL_MODES = ("auto", "hybrid", "vector", "lexical")
+
+# Each side of a hybrid search contributes this many candidates per requested result.
+HYBRID_CANDIDATES_PER_RESULT = 4
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever over a PersistentVectorStore that combines FAISS and BM25 results."""
+
+    store: Any
+    doc_hash: Optional[str] = None
+    k: int = 4
+    mode: str = "auto"
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        mode = self.mode
+        if mode == "auto":
+            mode = "lexical" if self.store.lexical_index.is_lookup_query(query) else "hybrid"
+        if mode == "lexical":
+            documents = self.store.lexical_search(query, self.doc_hash, self.k)
+            if documents or self.mode == "lexical":
+                increment("retrieval", mode="lexical")
+                return documents
+            # No chunk contains the terms; fall back to meaning-based search.
+            mode = "hybrid"
+        increment("retrieval", mode=mode)
+        if mode == "vector":
+            return self.store.vector_search(query, self.doc_hash, self.k)
+
+        candidates = self.k * HYBRID_CANDIDATES_PER_RESULT
+        return reciprocal_rank_fusion(
+            [
+                self.store.vector_search(query, self.doc_hash, candidates),
+                self.store.lexical_search(query, self.doc_hash, candidates),
+            ],
+            self.k,
+        )
+
+
+class PersistentVectorStore:
+    """
+    FAISS index persisted under `path` that grows incrementally.
+    Documents are tracked by content hash, so a document is embedded once
+    and later uploads of the same content only reuse the existing vectors.
+    """
+
+    def __init__(self, path, embeddings):
+        self.path = path
+        self.embeddings = embeddings
+        self._vectorstore = None
+        self._lexical = BM25Index()
+        self._doc_hashes = set()
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        if os.path.exists(os.path.join(self.path, "index.faiss")):
+            self._vectorstore = FAISS.load_local(
+                self.path, self.embeddings, allow_dangerous_deserialization=True
+            )
+            try:
+                with open(os.path.join(self.path, MANIFEST_FILE), "r") as file:
+                    self._doc_hashes = set(json.load(file))
+            except FileNotFoundError:
+                self._doc_hashes = set()
+            # The keyword index is cheap to rebuild from the stored chunks.
+            docstore = self._vectorstore.docstore
+            self._lexical.add_documents(
+                docstore.search(doc_id) for doc_id in self._vectorstore.index_to_docstore_id.values()
+            )
+        self._loaded = True
+
+    def _save(self):
+        self._vectorstore.save_local(self.path)
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        with open(manifest_path + ".tmp", "w") as file:
+            json.dump(sorted(self._doc_hashes), file)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def contains(self, doc_hash):
+        with self._lock:
+            self._ensure_loaded()
+            return doc_hash in self._doc_hashes
+
+    def add_documents(self, doc_hash, documents):
+        """
+        Embed and append `documents` unless `doc_hash` is already indexed.
+        `documents` may be a lazy iterable: each token-bounded batch is embedded
+        as soon as it has been produced. Nothing is added to the index until the
+        whole document went through, so a parse error midway leaves it unchanged.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if doc_hash in self._doc_hashes:
+                return False
+            texts, metadatas, vectors = [], [], []
+            for batch in batch_by_tokens(documents, text_of=lambda document: document.page_content):
+                batch_texts = [document.page_content for document in batch]
+                vectors.extend(self.embeddings.embed_documents(batch_texts))
+                texts.extend(batch_texts)
+                metadatas.extend({**document.metadata, "doc_hash": doc_hash} for document in batch)
+            if not texts:
+                return False
+            text_embeddings = list(zip(texts, vectors))
+            if self._vectorstore is None:
+                self._vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas)
+            else:
+                self._vectorstore.add_embeddings(text_embeddings, metadatas)
+            self._lexical.add_documents(
+                Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)
+            )
+            self._doc_hashes.add(doc_hash)
+            self._save()
+            return True
+
+    @property
+    def lexical_index(self):
+        with self._lock:
+            self._ensure_loaded()
+            return self._lexical
+
+    def _search_kwargs(self, doc_hash, k):
+        search_kwargs = {"k": k}
+        if doc_hash is not None:
+            # FAISS filters after the nearest-neighbour search, so widen it.
+            search_kwargs["filter"] = {"doc_hash": doc_hash}
+            search_kwargs["fetch_k"] = max(100, k * 20)
+        return search_kwargs
+
+    def vector_search(self, query, doc_hash=None, k=4):
+        """Nearest chunks by embedding; costs one embed_query call."""
+        with self._lock:
+            self._ensure_loaded()
+            vectorstore = self._vectorstore
+        if vectorstore is None:
+            return []
+        return vectorstore.similarity_search(query, **self._search_kwargs(doc_hash, k))
+
+    def lexical_search(self, query, doc_hash=None, k=4):
+        """Best BM25 matches; local only, no embedding call."""
+        return [document for document, _ in self.lexical_index.search(query, k, doc_hash)]
+
+    def as_retriever(self, doc_hash=None, k=1, mode="vector"):
+        """
+        Retriever over the whole index, or only over chunks of `doc_hash`.
+        `mode` is one of RETRIEVAL_MODES; "vector" returns the plain FAISS retriever.
+        """
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        with self._lock:
+            self._ensure_loaded()
+            if self._vectorstore is None:
+                raise ValueError("The vector store is empty; add documents first.")
+            if mode == "vector":
+                return self._vectorstore.as_retriever(search_kwargs=self._search_kwargs(doc_hash, k))
+        return HybridRetriever(store=self, doc_hash=doc_hash, k=k, mode=mode)
+
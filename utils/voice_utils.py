@@ -1,16 +1,234 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import speech_recognition as sr
 
-def record_audio_segment():
-    """Record a segment of audio and convert it to text."""
-    recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
+SEGMENT_SECONDS = 5
+
+
+class GoogleRecognizer:
+    """Google Web Speech API (network)."""
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class SphinxRecognizer:
+    """CMU Sphinx, fully offline (needs the `pocketsphinx` package)."""
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_sphinx(audio)
+
+
+class WhisperRecognizer:
+    """Local Whisper model (needs the `openai-whisper` package)."""
+
+    def __init__(self, model="base"):
+        self.recognizer = sr.Recognizer()
+        self.model = model
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_whisper(audio, model=self.model)
+
+
+class StubRecognizer:
+    """
+    Returns canned transcripts in segment order, for tests and demos without
+    a speech service. Falls back to "[segment N]" once `transcripts` runs out.
+    """
+
+    def __init__(self, transcripts=()):
+        self.transcripts = list(transcripts)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio):
+        with self._lock:
+            index = self._count
+            self._count += 1
+        if index < len(self.transcripts):
+            return self.transcripts[index]
+        return f"[segment {index + 1}]"
+
+
+RECOGNIZERS = {
+    "google": GoogleRecognizer,
+    "sphinx": SphinxRecognizer,
+    "whisper": WhisperRecognizer,
+    "stub": StubRecognizer,
+}
+
+
+def get_recognizer(name=None):
+    """Recognizer backend by name; defaults to $VOICE_RECOGNIZER or "google"."""
+    name = name or os.environ.get("VOICE_RECOGNIZER", "google")
+    try:
+        return RECOGNIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown speech recognizer: {name}")
+
+
+class MicrophoneSource:
+    """Yields fixed-length audio segments from the default microphone."""
+
+    def __init__(self, segment_seconds=SEGMENT_SECONDS):
+        self.segment_seconds = segment_seconds
+
+    def segments(self, stop_event):
+        recognizer = sr.Recognizer()
+        with sr.Microphone() as source:
+            recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            while not stop_event.is_set():
+                try:
+                    yield recognizer.listen(source, timeout=1, phrase_time_limit=self.segment_seconds)
+                except sr.WaitTimeoutError:
+                    # Silence; check the stop flag again.
+                    continue
+
+
+class WavFileSource:
+    """Yields fixed-length segments read from WAV files, standing in for a microphone."""
+
+    def __init__(self, paths, segment_seconds=SEGMENT_SECONDS):
+        self.paths = list(paths)
+        self.segment_seconds = segment_seconds
+
+    def segments(self, stop_event):
+        recognizer = sr.Recognizer()
+        for path in self.paths:
+            with sr.AudioFile(path) as source:
+                while not stop_event.is_set():
+                    audio = recognizer.record(source, duration=self.segment_seconds)
+                    if not audio.frame_data:
+                        break
+                    yield audio
+
+
+class VoiceCapture:
+    """
+    Records audio on a background thread and transcribes segments concurrently.
+    Transcripts are released strictly in recording order, so `take_text()` can be
+    polled on every Streamlit rerun and appended to the answer as it grows.
+    """
+
+    def __init__(self, source, recognizer, max_workers=2):
+        self.source = source
+        self.recognizer = recognizer
+        self.errors = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._results = {}
+        self._next_to_release = 0
+        self._segment_count = 0
+        self._transcribed = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._record, name="voice-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Ask recording to stop and return immediately. Segments already recorded
+        are still transcribed in the background; poll `is_finished` (or call
+        wait()) before taking the last of the text.
+        """
+        self._stop_event.set()
+
+    def wait(self, timeout=None):
+        """Block until recording has stopped and every segment is transcribed; for scripts and tests."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+
+    @property
+    def stopping(self):
+        return self._stop_event.is_set()
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_finished(self):
+        """True once recording ended (stopped or source exhausted) and all segments are transcribed."""
+        if self.is_running:
+            return False
+        with self._lock:
+            finished = self._transcribed == self._segment_count
+        if finished:
+            # Nothing is queued any more; release the worker threads.
+            self._executor.shutdown(wait=False)
+        return finished
+
+    @property
+    def segments_recorded(self):
+        with self._lock:
+            return self._segment_count
+
+    def _record(self):
         try:
-            audio = recognizer.listen(source, timeout=10)  # Listen for 10 seconds
-            text = recognizer.recognize_google(audio)  # Convert to text
-            return text
+            for audio in self.source.segments(self._stop_event):
+                with self._lock:
+                    index = self._segment_count
+                    self._segment_count += 1
+                self._executor.submit(self._transcribe, index, audio)
+        except Exception as e:
+            with self._lock:
+                self.errors.append(f"Recording failed: {e}")
+
+    def _transcribe(self, index, audio):
+        try:
+            text = self.recognizer.transcribe(audio)
         except sr.UnknownValueError:
-            return "Could not understand audio."
+            text = ""
         except sr.RequestError as e:
-            return f"Error with the recognition service: {e}"
+            text = ""
+            with self._lock:
+                self.errors.append(f"Error with the recognition service: {e}")
         except Exception as e:
-            return f"An unexpected error occurred: {e}"
+            text = ""
+            with self._lock:
+                self.errors.append(f"An unexpected error occurred: {e}")
+        with self._lock:
+            self._results[index] = text
+            self._transcribed += 1
+
+    def has_new_text(self):
+        with self._lock:
+            return self._next_to_release in self._results
+
+    def take_text(self):
+        """Return transcripts finished since the last call, in recording order."""
+        parts = []
+        with self._lock:
+            while self._next_to_release in self._results:
+                text = self._results.pop(self._next_to_release)
+                if text:
+                    parts.append(text)
+                self._next_to_release += 1
+        return " ".join(parts)
+
+
+def start_voice_capture(recognizer=None, wav_files=None, segment_seconds=SEGMENT_SECONDS):
+    """
+    Start a VoiceCapture. Reads from the microphone unless `wav_files` is given
+    or $VOICE_WAV_FILES lists WAV paths (separated by os.pathsep).
+    """
+    if wav_files is None and os.environ.get("VOICE_WAV_FILES"):
+        wav_files = os.environ["VOICE_WAV_FILES"].split(os.pathsep)
+    if wav_files:
+        source = WavFileSource(wav_files, segment_seconds)
+    else:
+        source = MicrophoneSource(segment_seconds)
+    if recognizer is None or isinstance(recognizer, str):
+        recognizer = get_recognizer(recognizer)
+    return VoiceCapture(source, recognizer).start()